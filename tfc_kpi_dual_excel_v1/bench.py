@@ -0,0 +1,168 @@
+
+import os, sys, json, time, platform, statistics, subprocess, tempfile, tracemalloc
+import numpy as np
+import pandas as pd
+from typing import Callable, Dict, List, Optional
+import disk_cache, ingest, kpi_cube, kpi_defs, kpi_engine
+from filter_index import FilterIndex
+from synth_workbooks import make_workbooks
+
+# rows per OPS sheet; every tier has 3 OPS sheets and a FIN sheet of the same length
+TIERS = {"s": 2_000, "m": 20_000, "l": 100_000}
+BENCH_DIR = os.environ.get("TFC_BENCH_DIR", os.path.join(tempfile.gettempdir(), "tfc_bench"))
+
+def _cold():
+    # forget every cache layer so a stage measures real work
+    disk_cache.invalidate()
+    disk_cache._hash_memo.clear()
+    kpi_cube._PARTIALS_MEMO.clear()
+    ingest._FACT_MEMO.clear()
+
+def _legacy_filter(sheets: List[pd.DataFrame], rounds, weeks) -> pd.DataFrame:
+    # the pre-fact-table page path: concat + coerce_num + add_time_filters' isin masks
+    df = pd.concat(sheets, ignore_index=True, sort=False)
+    df = ingest.coerce_num(df, ingest.KPI_COLS)
+    mask = pd.Series(True, index=df.index)
+    if "round" in df.columns: mask &= df["round"].isin(rounds)
+    if "week" in df.columns: mask &= df["week"].isin(weeks)
+    return df[mask]
+
+def _legacy_groupbys(df: pd.DataFrame, src: str) -> int:
+    # the per-page groupbys on filtered rows, for the same charts kpi_engine scores from the cube
+    n = 0
+    for _, _, s, dims, metric in kpi_engine.AGGREGATES:
+        if s == src and metric in df.columns and all(d in df.columns for d in dims):
+            n += len(df.groupby(dims, observed=True)[metric].agg(kpi_defs.KPIS[metric][0]))
+    return n
+
+def stages(ops: str, fin: str) -> Dict[str, Callable[[], object]]:
+    parsed = ingest.parse_workbooks([ops, fin])
+    sheets = list(parsed[0].values())
+    data = ingest.load_data(ops, fin)
+    fact = data["facts"]["OPS"]
+    sel = kpi_engine.default_selection(data["index"]["OPS"], 12)
+    filtered = _legacy_filter(sheets, sel["round"], sel["week"])
+
+    def parse_pandas():
+        engine, ingest.INGEST_ENGINE = ingest.INGEST_ENGINE, "pandas"
+        try:
+            return ingest.parse_workbooks([ops, fin])
+        finally:
+            ingest.INGEST_ENGINE = engine
+
+    def load_cold():
+        _cold()
+        return ingest.load_data(ops, fin)
+
+    def load_warm():
+        kpi_cube._PARTIALS_MEMO.clear()  # disk cache only, as in a fresh server process
+        ingest._FACT_MEMO.clear()
+        return ingest.load_data(ops, fin)
+
+    def index_filter():
+        ix = data["index"]["OPS"]
+        return fact.iloc[ix.rows(sel)]
+
+    return {
+        "parse_stream": lambda: ingest.parse_workbooks([ops, fin]),
+        "parse_pandas": parse_pandas,
+        **{f"parse_stream_w{w}": (lambda w=w: ingest.parse_workbooks([ops, fin], workers=w)) for w in (1, 2, 4)},
+        "load_sources_cold": load_cold,
+        "load_sources_warm": load_warm,
+        "build_fact": lambda: ingest.build_fact(parsed[0]),
+        "build_index": lambda: FilterIndex(fact, ingest.DIM_COLS),
+        "build_cube": lambda: ingest.build_cube(parsed[0]),  # the per-sheet path load_data takes (no fingerprints, so no memo)
+        "concat_time_filter": lambda: _legacy_filter(sheets, sel["round"], sel["week"]),
+        "index_time_filter": index_filter,
+        "page_groupbys": lambda: _legacy_groupbys(filtered, "OPS"),
+        "kpi_engine_score": lambda: kpi_engine.score(data, 12),  # every tile + aggregate, OPS and FIN
+    }
+
+def measure(fn: Callable[[], object], repeat: int) -> Dict[str, float]:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {"seconds": statistics.median(times), "min_seconds": min(times), "runs": repeat, "peak_mb": peak / 2**20}
+
+def _meta() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ""
+    return {"commit": commit, "python": platform.python_version(), "pandas": pd.__version__,
+            "numpy": np.__version__, "machine": platform.machine(), "created": time.time()}
+
+def run(tiers: List[str], repeat: int = 3, only: Optional[List[str]] = None) -> dict:
+    out = {"meta": _meta(), "results": []}
+    with tempfile.TemporaryDirectory(prefix="tfc_bench_cache_") as cache_dir:
+        disk_cache.FRAMES_DIR = os.path.join(cache_dir, "frames")  # never touch the app's cache
+        try:
+            for tier in tiers:
+                out["results"] += _run_tier(tier, repeat, only)
+        finally:
+            disk_cache.FRAMES_DIR = os.path.join(disk_cache.CACHE_DIR, "frames")
+    return out
+
+def _run_tier(tier: str, repeat: int, only: Optional[List[str]]) -> List[dict]:
+    rows, results = TIERS[tier], []
+    ops, fin = os.path.join(BENCH_DIR, tier, "ops.xlsx"), os.path.join(BENCH_DIR, tier, "fin.xlsx")
+    if not (os.path.exists(ops) and os.path.exists(fin)):
+        make_workbooks(os.path.join(BENCH_DIR, tier), rows=rows, sheets=3, seed=0)
+    total_rows, total_bytes = rows * 4, os.path.getsize(ops) + os.path.getsize(fin)
+    for stage, fn in stages(ops, fin).items():
+        if only and stage not in only:
+            continue
+        r = measure(fn, repeat)
+        r.update(tier=tier, stage=stage, rows=total_rows, bytes=total_bytes,
+                 rows_per_s=total_rows / r["seconds"] if r["seconds"] else None,
+                 mb_per_s=total_bytes / 2**20 / r["seconds"] if r["seconds"] and stage.startswith(("parse", "load")) else None)
+        results.append(r)
+        print(f"{tier:>2} {stage:<20} {r['seconds']*1000:10.1f} ms  {r['peak_mb']:8.1f} MB peak", file=sys.stderr)
+    return results
+
+def compare(old: dict, new: dict, threshold: float = 0.10) -> List[str]:
+    # stages more than threshold slower (median seconds) in new than in old
+    base = {(r["tier"], r["stage"]): r for r in old["results"]}
+    slower = []
+    print(f"{'tier':>4} {'stage':<20} {'old ms':>10} {'new ms':>10} {'ratio':>7} {'peak MB':>15}")
+    for r in new["results"]:
+        b = base.get((r["tier"], r["stage"]))
+        if b is None:
+            continue
+        ratio = r["seconds"] / b["seconds"] if b["seconds"] else float("inf")
+        flag = " SLOWER" if ratio > 1 + threshold else ""
+        print(f"{r['tier']:>4} {r['stage']:<20} {b['seconds']*1000:10.1f} {r['seconds']*1000:10.1f} {ratio:7.2f} "
+              f"{b['peak_mb']:7.1f}->{r['peak_mb']:<7.1f}{flag}")
+        if flag:
+            slower.append(f"{r['tier']}/{r['stage']}")
+    return slower
+
+if __name__ == "__main__":
+    # python bench.py [--tiers s,m,l] [--repeat 3] [-o bench.json]
+    # python bench.py --compare old.json new.json [--threshold 0.1]   (exit 1 on regressions)
+    import argparse
+    ap = argparse.ArgumentParser(description="Time ingestion and KPI stages on synthetic workbooks")
+    ap.add_argument("--tiers", default="s,m")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--stages", default="", help="comma-separated subset of stages")
+    ap.add_argument("-o", "--out", default="bench.json")
+    ap.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"))
+    ap.add_argument("--threshold", type=float, default=0.10)
+    args = ap.parse_args()
+    if args.compare:
+        with open(args.compare[0]) as f0, open(args.compare[1]) as f1:
+            slower = compare(json.load(f0), json.load(f1), args.threshold)
+        sys.exit(1 if slower else 0)
+    res = run([t for t in args.tiers.split(",") if t], args.repeat, [s for s in args.stages.split(",") if s] or None)
+    with open(args.out, "w") as f:
+        json.dump(res, f, indent=1)
+    print(f"wrote {args.out}", file=sys.stderr)
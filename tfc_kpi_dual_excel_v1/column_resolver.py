@@ -0,0 +1,81 @@
+
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+def _n(s): return re.sub(r'[^a-z0-9]+','',str(s).strip().lower())
+
+class Resolved(NamedTuple):
+    column: object
+    key: Optional[str]
+    rule: Optional[str]   # "alias:<normalized>" or "fallback#<i>:<terms>"
+
+def _compile_term(t: str):
+    if t.startswith("="): return lambda n, v=t[1:]: n == v
+    if t.startswith("^"): return lambda n, v=t[1:]: n.startswith(v)
+    if t.endswith("$"): return lambda n, v=t[:-1]: n.endswith(v)
+    return lambda n, v=t: v in n
+
+class ColumnResolver:
+    # ALIAS is compiled into one exact-match table. Fallback alternatives are bucketed by an anchored term
+    # ("=x" in a dict keyed by x, "x$"/"^x" keyed by the suffix/prefix), so a name only tries the rules
+    # whose anchor it meets plus the unanchored substring rules; the lowest rule index still wins.
+    # Every (raw name -> key, rule) answer is memoized
+    def __init__(self, alias: Dict[str, List[str]], fallback_rules: List[Tuple[str, List[str]]], memo_size: int = 65536):
+        self.exact = {_n(v): (k, f"alias:{_n(v)}") for k, vals in alias.items() for v in vals}
+        self.rules = []
+        self.by_equal: Dict[str, list] = {}
+        self.by_suffix: Dict[str, list] = {}
+        self.by_prefix: Dict[str, list] = {}
+        self.unanchored: list = []
+        for i, (target, alternatives) in enumerate(fallback_rules):
+            for alt in alternatives:
+                terms = alt.split()
+                rank = len(self.rules)
+                self.rules.append((target, f"fallback#{i}:{alt}"))
+                anchor = next((t for t in terms if t.startswith("=")), None) \
+                    or next((t for t in terms if t.endswith("$")), None) \
+                    or next((t for t in terms if t.startswith("^")), None)
+                entry = (rank, tuple(_compile_term(t) for t in terms if t != anchor))
+                if anchor is None:
+                    self.unanchored.append(entry)
+                elif anchor.startswith("="):
+                    self.by_equal.setdefault(anchor[1:], []).append(entry)
+                elif anchor.endswith("$"):
+                    self.by_suffix.setdefault(anchor[:-1], []).append(entry)
+                else:
+                    self.by_prefix.setdefault(anchor[1:], []).append(entry)
+        self._resolve = lru_cache(maxsize=memo_size)(self._resolve_uncached)
+
+    def _buckets(self, n: str):
+        yield self.by_equal.get(n, ())
+        for s, bucket in self.by_suffix.items():
+            if n.endswith(s): yield bucket
+        for p, bucket in self.by_prefix.items():
+            if n.startswith(p): yield bucket
+        yield self.unanchored
+
+    def _resolve_uncached(self, raw: str) -> Tuple[Optional[str], Optional[str]]:
+        n = _n(raw)
+        hit = self.exact.get(n)
+        if hit: return hit
+        best = len(self.rules)
+        for bucket in self._buckets(n):
+            for rank, preds in bucket:  # buckets are in rule order: stop at the first match or past best
+                if rank >= best: break
+                if all(p(n) for p in preds):
+                    best = rank
+                    break
+        return self.rules[best] if best < len(self.rules) else (None, None)
+
+    def resolve(self, c) -> Resolved:
+        return Resolved(c, *self._resolve(str(c)))
+
+    def std_col(self, c) -> Optional[str]:
+        return self._resolve(str(c))[0]
+
+    def resolve_columns(self, cols: Iterable) -> List[Resolved]:
+        return [self.resolve(c) for c in cols]
+
+    def cache_info(self):
+        return self._resolve.cache_info()
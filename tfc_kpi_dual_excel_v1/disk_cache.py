@@ -0,0 +1,120 @@
+
+import os, json, hashlib, shutil, time
+from typing import Dict, Optional
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # no pyarrow -> every sheet falls back to pickle
+    pa = pq = None
+
+CACHE_DIR = os.environ.get("TFC_CACHE_DIR", ".tfc_cache")
+CACHE_MAX_MB = float(os.environ.get("TFC_CACHE_MAX_MB", "512"))
+FRAMES_DIR = os.path.join(CACHE_DIR, "frames")
+
+_hash_memo: Dict[tuple, str] = {}
+
+def content_hash(src) -> Optional[str]:
+    # sha256 of the workbook bytes; paths are memoized on (path, mtime, size)
+    if isinstance(src, (str, os.PathLike)):
+        try:
+            st_ = os.stat(src)
+        except OSError:
+            return None
+        memo_key = (os.path.abspath(src), st_.st_mtime_ns, st_.st_size)
+        if memo_key in _hash_memo:
+            return _hash_memo[memo_key]
+        h = hashlib.sha256()
+        with open(src, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        _hash_memo[memo_key] = h.hexdigest()
+        return _hash_memo[memo_key]
+    if isinstance(src, (bytes, bytearray)):
+        return hashlib.sha256(src).hexdigest()
+    if hasattr(src, "getvalue"):
+        return hashlib.sha256(src.getvalue()).hexdigest()
+    return None
+
+def _entry_dir(key: str) -> str:
+    return os.path.join(FRAMES_DIR, key)
+
+def _write_frame(df: pd.DataFrame, base: str) -> str:
+    if pq is not None:
+        try:
+            pq.write_table(pa.Table.from_pandas(df, preserve_index=False), base + ".parquet")
+            return "parquet"
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            # mixed-type object columns can't be expressed in Arrow
+            if os.path.exists(base + ".parquet"):
+                os.remove(base + ".parquet")
+    df.to_pickle(base + ".pkl")
+    return "pickle"
+
+def _read_frame(base: str, fmt: str) -> pd.DataFrame:
+    if fmt == "parquet":
+        return pq.read_table(base + ".parquet", memory_map=True).to_pandas()
+    return pd.read_pickle(base + ".pkl")
+
+def get(key: str) -> Optional[Dict[str, pd.DataFrame]]:
+    d = _entry_dir(key)
+    manifest = os.path.join(d, "manifest.json")
+    if not os.path.exists(manifest):
+        return None
+    try:
+        with open(manifest) as f:
+            meta = json.load(f)
+        if pq is None and any(fmt == "parquet" for _, _, fmt in meta["sheets"]):
+            return None
+        out = {name: _read_frame(os.path.join(d, fname), fmt) for name, fname, fmt in meta["sheets"]}
+    except Exception:
+        invalidate(key)
+        return None
+    os.utime(manifest)  # LRU stamp for eviction
+    return out
+
+def put(key: str, frames: Dict[str, pd.DataFrame], evict_after: bool = True) -> None:
+    # evict_after=False leaves the size check (a stat of every entry) to the caller, once per batch of puts
+    os.makedirs(FRAMES_DIR, exist_ok=True)
+    d = _entry_dir(key)
+    tmp = f"{d}.tmp-{os.getpid()}-{time.monotonic_ns()}"
+    os.makedirs(tmp)
+    try:
+        sheets = []
+        for i, (name, df) in enumerate(frames.items()):
+            fname = f"{i:03d}"
+            sheets.append([name, fname, _write_frame(df, os.path.join(tmp, fname))])
+        with open(os.path.join(tmp, "manifest.json"), "w") as f:
+            json.dump({"sheets": sheets, "created": time.time()}, f)
+        os.replace(tmp, d)
+    except OSError:
+        # another worker published the same key first, or the disk is full
+        shutil.rmtree(tmp, ignore_errors=True)
+        return
+    if evict_after:
+        evict()
+
+def _dir_size(d: str) -> int:
+    return sum(e.stat().st_size for e in os.scandir(d) if e.is_file())
+
+def evict(max_mb: Optional[float] = None) -> None:
+    limit = (CACHE_MAX_MB if max_mb is None else max_mb) * 1024 * 1024
+    if not os.path.isdir(FRAMES_DIR):
+        return
+    entries = []
+    for e in os.scandir(FRAMES_DIR):
+        manifest = os.path.join(e.path, "manifest.json")
+        if e.is_dir() and os.path.exists(manifest):
+            entries.append((os.stat(manifest).st_mtime, _dir_size(e.path), e.path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= limit:
+            break
+        shutil.rmtree(path, ignore_errors=True)
+        total -= size
+
+def invalidate(key: Optional[str] = None) -> None:
+    # drop one entry, or the whole cache when no key is given
+    target = _entry_dir(key) if key else FRAMES_DIR
+    shutil.rmtree(target, ignore_errors=True)
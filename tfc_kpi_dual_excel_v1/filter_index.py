@@ -0,0 +1,67 @@
+
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Sequence
+
+class FilterIndex:
+    # per-dimension posting lists (ascending row positions per category) over a fact table,
+    # so multiselect filters resolve by set intersection instead of isin() column scans
+    def __init__(self, df: pd.DataFrame, cols: Sequence[str]):
+        self.n = len(df)
+        self.values: Dict[str, list] = {}
+        self.lookup: Dict[str, Dict[object, int]] = {}
+        self.codes: Dict[str, np.ndarray] = {}
+        self.postings: Dict[str, List[np.ndarray]] = {}
+        self.notnull: Dict[str, np.ndarray] = {}
+        for c in cols:
+            if c not in df.columns:
+                continue
+            col = df[c] if isinstance(df[c].dtype, pd.CategoricalDtype) else df[c].astype("category")
+            codes = col.cat.codes.to_numpy()
+            cats = col.cat.categories.tolist()
+            order = np.argsort(codes, kind="stable")
+            nulls = int((codes < 0).sum())  # NaN rows (code -1) sort first
+            bounds = nulls + np.concatenate([[0], np.cumsum(np.bincount(codes[codes >= 0], minlength=len(cats)))])
+            self.postings[c] = [order[bounds[i]:bounds[i+1]] for i in range(len(cats))]
+            self.notnull[c] = np.sort(order[nulls:])
+            self.codes[c] = codes
+            self.values[c] = cats
+            self.lookup[c] = {v: i for i, v in enumerate(cats)}
+
+    def freeze(self) -> "FilterIndex":
+        # shared across sessions: row arrays handed to pages must not be writable
+        for arr in [*self.codes.values(), *self.notnull.values(), *(p for ps in self.postings.values() for p in ps)]:
+            arr.flags.writeable = False
+        return self
+
+    def take(self, df: pd.DataFrame, rows: np.ndarray) -> pd.DataFrame:
+        # those rows (positional take, always a copy); when every row is selected, a shallow copy of the
+        # shared frame: no data is copied, and columns a page adds or drops stay out of the shared facts
+        return df.copy(deep=False) if len(rows) == self.n else df.iloc[rows]
+
+    def options(self, col: str, rows: Optional[np.ndarray] = None) -> list:
+        # distinct non-null values of col, optionally restricted to a row subset
+        if col not in self.codes:
+            return []
+        if rows is None:
+            return [v for v, p in zip(self.values[col], self.postings[col]) if len(p)]
+        present = np.unique(self.codes[col][rows])
+        return [self.values[col][i] for i in present if i >= 0]
+
+    def rows(self, sel: Dict[str, list], base: Optional[np.ndarray] = None) -> np.ndarray:
+        # ascending row positions matching every non-empty selection (same semantics as isin masks)
+        result = base
+        for c, picked in sel.items():
+            if c not in self.postings or not picked:
+                continue
+            ids = {self.lookup[c][v] for v in picked if v in self.lookup[c]}
+            if len(ids) == len(self.values[c]):
+                hit = self.notnull[c]
+            elif len(ids) == 1:
+                hit = self.postings[c][next(iter(ids))]
+            elif ids:
+                hit = np.sort(np.concatenate([self.postings[c][i] for i in ids]))
+            else:
+                hit = np.empty(0, dtype=np.intp)
+            result = hit if result is None else np.intersect1d(result, hit, assume_unique=True)
+        return np.arange(self.n) if result is None else result
@@ -0,0 +1,61 @@
+
+import io, re, hashlib, zipfile, posixpath
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Optional
+
+_NS = {"m": "http://schemas.openxmlformats.org/spreadsheetml/2006/main",
+       "rel": "http://schemas.openxmlformats.org/package/2006/relationships"}
+_RID = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id"
+_SI = re.compile(rb"<si\b[^>]*?(?:/>|>(.*?)</si>)", re.S)
+_SHARED_REF = re.compile(rb'(<c\b[^>]*?\bt="s"[^>]*>\s*<v>)(\d+)(</v>)')
+_STYLE_REF = re.compile(rb'(<c\b[^>]*?\bs=")(\d+)(")')
+
+def _open(src):
+    if isinstance(src, (bytes, bytearray)): return io.BytesIO(src)
+    if hasattr(src, "getvalue"): return io.BytesIO(src.getvalue())
+    return src
+
+def _shared_strings(zf: zipfile.ZipFile) -> List[bytes]:
+    try:
+        return [m.group(1) or b"" for m in _SI.finditer(zf.read("xl/sharedStrings.xml"))]
+    except KeyError:
+        return []
+
+def _cell_formats(zf: zipfile.ZipFile) -> List[bytes]:
+    # number format per cell style: the only part of styles.xml that changes parsed values
+    try:
+        styles = ET.fromstring(zf.read("xl/styles.xml"))
+    except KeyError:
+        return []
+    codes = {f.get("numFmtId"): f.get("formatCode") for f in styles.iterfind("m:numFmts/m:numFmt", _NS)}
+    return [(codes.get(x.get("numFmtId")) or x.get("numFmtId") or "0").encode()
+            for x in styles.iterfind("m:cellXfs/m:xf", _NS)]
+
+def sheet_fingerprints(src) -> Optional[Dict[str, str]]:
+    # per-sheet digest of an .xlsx without parsing cells: the sheet XML with shared-string
+    # and style indices replaced by what they point to, so a re-export that only appends
+    # other sheets (and renumbers the shared tables) leaves unchanged sheets' digests alone
+    try:
+        zf = zipfile.ZipFile(_open(src))
+    except (zipfile.BadZipFile, OSError, TypeError, ValueError):
+        return None
+    try:
+        with zf:
+            wb = ET.fromstring(zf.read("xl/workbook.xml"))
+            rels = ET.fromstring(zf.read("xl/_rels/workbook.xml.rels"))
+            targets = {r.get("Id"): r.get("Target") for r in rels.iterfind("rel:Relationship", _NS)}
+            strings, formats = _shared_strings(zf), _cell_formats(zf)
+            pr = wb.find("m:workbookPr", _NS)
+            date1904 = (pr.get("date1904", "0") if pr is not None else "0").encode()
+            out = {}
+            for sh in wb.iterfind("m:sheets/m:sheet", _NS):
+                target = targets[sh.get(_RID)]
+                path = target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join("xl", target))
+                xml = _SHARED_REF.sub(lambda m: m.group(1) + b"s:" + strings[int(m.group(2))] + m.group(3), zf.read(path))
+                xml = _STYLE_REF.sub(lambda m: m.group(1) + (formats[int(m.group(2))] if int(m.group(2)) < len(formats) else m.group(2)) + m.group(3), xml)
+                h = hashlib.sha256(sh.get("name").encode() + b"\0" + date1904 + b"\0")
+                h.update(xml)
+                out[sh.get("name")] = h.hexdigest()
+            return out
+    except (KeyError, IndexError, ET.ParseError, zipfile.BadZipFile):
+        return None
@@ -0,0 +1,483 @@
+
+import pandas as pd
+import numpy as np
+import glob, os, io, json, hashlib, threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Set, Tuple, Optional
+import disk_cache
+import perf
+from fingerprints import sheet_fingerprints
+import watcher
+from column_resolver import ColumnResolver
+from filter_index import FilterIndex
+from kpi_cube import KpiCube
+from joins import build_joins
+import kpi_defs
+import sql_backend
+
+ALIAS = {
+    "round": ["round","period","cycle"],
+    "week": ["week","wk"],
+    "date": ["date","day","timestamp"],
+    "customer": ["customer","client","channel","account"],
+    "product": ["product","sku","item","fg","finished good","finished_goods","fg_sku"],
+    "component": ["component","rawmaterial","raw_material","rm","ingredient","material"],
+    "supplier": ["supplier","vendor"],
+    "plant": ["plant","factory","site","production_site","mixing","bottling"],
+    "warehouse": ["warehouse","dc","inbound_warehouse","outbound_warehouse"],
+    "order_qty": ["orderqty","order_qty","ordered_qty","orders","demand_qty","demand"],
+    "delivered_qty": ["deliveredqty","delivered_qty","ship_qty","shipped_qty","deliveries"],
+    "backorder_qty": ["backorderqty","backorder_qty","bo_qty","backorders"],
+    "revenue": ["realizedrevenue","revenue","sales_value","sales"],
+    "price": ["price","unit_price","selling_price"],
+    "discount": ["discount","disc_pct","discount_pct"],
+    "cogs": ["cogs","cost_of_goods_sold","cost of goods sold","product_cost"],
+    "indirect_cost": ["indirectcost","indirect_cost","overhead","opex"],
+    "operating_profit": ["operatingprofit","operating_profit","net_profit","profit","ebit"],
+    "capital_employed": ["capitalemployed","capital_employed","cap_employed"],
+    "roi_pct": ["roi_pct","roi%","roi","return_on_investment"],
+    "service_level_pct": ["servicelevelpct","service_level_pct","service_level","fill_rate","fillrate"],
+    "shelf_life_days": ["shelflifeachieveddays","shelf_life_days","shelf_life","shelflife"],
+    "forecast": ["forecast","fcst"],
+    "forecast_error_pct": ["forecasterrorpct","forecast_error_pct","mape","forecast_error"],
+    "obsolescence_qty": ["obsolescenceqty","obsolete_qty","obsolescence_qty"],
+    "obsolescence_value": ["obsolescencevalue","obsolete_value","obsolescence_value"],
+    "component_availability_pct": ["componentavailabilitypct","component_availability_pct"],
+    "product_availability_pct": ["productavailabilitypct","product_availability_pct","availability"],
+    "delivery_reliability_pct": ["deliveryreliabilitypct","delivery_reliability_pct","on_time_delivery_pct"],
+    "rejection_pct": ["rejectionpct","rejection_pct","reject_rate_pct","quality_reject_pct"],
+    "component_obsolete_pct": ["componentobsoletepct","component_obsolete_pct"],
+    "raw_material_cost_pct": ["rawmaterialcostpct","raw_material_cost_pct","rm_cost_pct"],
+    "inbound_cube_util_pct": ["inboundcubeutilpct","inbound_cube_util_pct","inbound_util_pct"],
+    "outbound_cube_util_pct": ["outboundcubeutilpct","outbound_cube_util_pct","outbound_util_pct"],
+    "mixing_util_pct": ["mixingutilpct","mixing_util_pct"],
+    "bottling_util_pct": ["bottlingutilpct","bottling_util_pct"],
+    "plan_adherence_pct": ["productionplanadherencepct","plan_adherence_pct","schedule_adherence_pct"],
+}
+
+PARSE_WORKERS = int(os.environ.get("TFC_PARSE_WORKERS", "1"))  # >1 parses sheets in a process pool
+INGEST_ENGINE = os.environ.get("TFC_INGEST", "stream")  # "stream" (openpyxl read_only) or "pandas"
+BACKEND = os.environ.get("TFC_BACKEND", "pandas")  # KPI aggregation engine: "pandas" or "duckdb"
+INCREMENTAL = os.environ.get("TFC_INCREMENTAL", "1") != "0"  # per-sheet cache entries keyed on sheet fingerprints
+
+# ordered std_col fallbacks, tried after the exact ALIAS lookup. An alternative matches
+# when all its terms do: "=x" exact, "^x" prefix, "x$" suffix, anything else substring.
+FALLBACK_RULES = [
+    ("service_level_pct", ["pct$ service", "pct$ fill"]),
+    ("product_availability_pct", ["pct$ availability product"]),
+    ("component_availability_pct", ["pct$ availability component"]),
+    ("delivery_reliability_pct", ["pct$ ontime", "pct$ reliab"]),
+    ("rejection_pct", ["pct$ reject"]),
+    ("component_obsolete_pct", ["pct$ obsolete component"]),
+    ("inbound_cube_util_pct", ["pct$ util inbound"]),
+    ("outbound_cube_util_pct", ["pct$ util outbound"]),
+    ("mixing_util_pct", ["pct$ util mix"]),
+    ("bottling_util_pct", ["pct$ util bottling"]),
+    ("plan_adherence_pct", ["pct$ adherence", "pct$ schedule"]),
+    ("roi_pct", ["pct$ roi"]),
+    ("raw_material_cost_pct", ["pct$ raw cost"]),
+    ("order_qty", ["order qty"]),
+    ("delivered_qty", ["deliver qty", "ship qty"]),
+    ("backorder_qty", ["backorder qty"]),
+    ("obsolescence_qty", ["obsolesc qty"]),
+    ("obsolescence_value", ["obsolesc val"]),
+    ("revenue", ["revenue", "=sales"]),
+    ("cogs", ["cogs", "costofgoods"]),
+    ("indirect_cost", ["overhead", "indirect", "=opex"]),
+    ("operating_profit", ["profit", "ebit"]),
+    ("product", ["=sku", "=fgsku", "=fg", "=item"]),
+    ("customer", ["customer", "client", "channel"]),
+    ("supplier", ["supplier", "vendor"]),
+    ("component", ["component", "material", "raw"]),
+    ("plant", ["plant", "factory", "site"]),
+    ("warehouse", ["warehouse", "=dc", "=inboundwarehouse", "=outboundwarehouse"]),
+    ("week", ["^week", "=wk"]),
+    ("round", ["=round", "=period", "=cycle"]),
+    ("date", ["date", "timestamp", "=day"]),
+    ("forecast_error_pct", ["forecast error"]),
+    ("forecast", ["=forecast", "fcst"]),
+    ("shelf_life_days", ["shelf"]),
+    ("price", ["=price", "unitprice"]),
+    ("discount", ["discount"]),
+    ("capital_employed", ["capital employed"]),
+    ("roi_pct", ["roi"]),
+]
+
+_resolver = ColumnResolver(ALIAS, FALLBACK_RULES)
+std_col = _resolver.std_col
+resolve_columns = _resolver.resolve_columns  # batch API: [(column, key, rule), ...]
+
+# cached sheets are keyed on this; bump MAPPING_REV when ingestion semantics change
+MAPPING_REV = 1
+ALIAS_VERSION = hashlib.sha1(json.dumps([MAPPING_REV, ALIAS, FALLBACK_RULES], sort_keys=True).encode()).hexdigest()[:12]
+
+def list_candidate_excels()->List[str]:
+    # find .xlsx files in cwd and /data (non-hidden); served from the watcher's index when it is live
+    indexed = watcher.read_index()
+    if indexed is not None:
+        return sorted(p for p in indexed if os.path.exists(p))
+    files = []
+    for root in watcher.ROOTS:
+        for p in glob.glob(os.path.join(root, "*.xlsx")):
+            files.append(p)
+    return sorted(list(dict.fromkeys(files)))  # unique, stable order
+
+def _standardize_sheet(df: pd.DataFrame, s: str)->Optional[pd.DataFrame]:
+    if df.empty:
+        return None
+    mapped={}
+    for c in df.columns:
+        key = std_col(c)
+        if key and key not in mapped:
+            mapped[key]=df[c]
+    if not mapped:
+        return None
+    sdf=pd.DataFrame(mapped)
+    sdf["__sheet"]=s
+    return sdf
+
+def _parse_workbook_pandas(fileobj_or_path, sheets: Optional[Set[str]]=None)->Dict[str,pd.DataFrame]:
+    try:
+        xls = pd.ExcelFile(fileobj_or_path)
+    except Exception:
+        return {}
+    out={}
+    for s in xls.sheet_names:
+        if sheets is not None and s not in sheets:
+            continue
+        try:
+            df = xls.parse(s)
+        except Exception:
+            continue
+        sdf = _standardize_sheet(df, s)
+        if sdf is not None:
+            out[s]=sdf
+    return out
+
+# strings pandas' reader turns into NaN (default na_values plus Excel error cells)
+_NA_STRINGS = {"", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+               "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+               "#NULL!", "#DIV/0!", "#VALUE!", "#REF!", "#NAME?", "#NUM!"}
+
+def _cell(v):
+    # mirror pandas' openpyxl conversion: integral floats -> int, NA markers -> None
+    if isinstance(v, float) and v.is_integer(): return int(v)
+    if isinstance(v, str) and v in _NA_STRINGS: return None
+    return v
+
+def _header_names(row)->List:
+    # same column names pandas would produce: "Unnamed: i" and "x.1"-style dedup
+    names, seen = [], {}
+    for i, v in enumerate(row):
+        v = _cell(v)
+        name = f"Unnamed: {i}" if v is None else v
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        seen.setdefault(name, 0)
+        names.append(name)
+    return names
+
+def _column_array(vals: List):
+    kinds = {type(v) for v in vals if v is not None}
+    if kinds <= {int} and None not in vals:
+        return np.fromiter(vals, dtype=np.int64, count=len(vals))
+    if kinds <= {int, float}:
+        return np.fromiter((np.nan if v is None else v for v in vals), dtype=np.float64, count=len(vals))
+    col = pd.Series([np.nan if v is None else v for v in vals], dtype=object)
+    if str in kinds:
+        try:
+            return pd.to_numeric(col).to_numpy()  # numeric text cells, as pandas infers them
+        except (ValueError, TypeError):
+            pass
+    return col.infer_objects().to_numpy()
+
+def _stream_sheet(ws, s: str)->Optional[pd.DataFrame]:
+    # header first, then only the mapped column positions are materialized
+    rows = ws.iter_rows(values_only=True)
+    header = next((r for r in rows if any(v is not None for v in r)), None)
+    if header is None:
+        return None
+    picks={}
+    for i, c in enumerate(_header_names(header)):
+        key = std_col(c)
+        if key and key not in picks:
+            picks[key]=i
+    if not picks:
+        return None
+    bufs = {k: [] for k in picks}
+    for r in rows:
+        if all(v is None for v in r):
+            continue
+        for k, i in picks.items():
+            bufs[k].append(_cell(r[i]) if i < len(r) else None)
+    if not bufs[next(iter(bufs))]:
+        return None
+    sdf = pd.DataFrame({k: _column_array(v) for k, v in bufs.items()})
+    sdf["__sheet"]=s
+    return sdf
+
+def _open_stream(payload):
+    from openpyxl import load_workbook
+    return load_workbook(_open_payload(payload), read_only=True, data_only=True)
+
+def _parse_workbook_stream(fileobj_or_path, sheets: Optional[Set[str]]=None)->Dict[str,pd.DataFrame]:
+    wb = _open_stream(_as_payload(fileobj_or_path))
+    try:
+        out={}
+        for ws in wb.worksheets:
+            if sheets is not None and ws.title not in sheets:
+                continue
+            sdf = _stream_sheet(ws, ws.title)
+            if sdf is not None:
+                out[ws.title]=sdf
+        return out
+    finally:
+        wb.close()
+
+def parse_workbook(fileobj_or_path, sheets: Optional[Set[str]]=None)->Dict[str,pd.DataFrame]:
+    # sheets limits parsing to those sheet names (None = all)
+    if INGEST_ENGINE == "stream":
+        try:
+            return _parse_workbook_stream(fileobj_or_path, sheets)
+        except Exception:
+            pass  # unreadable for the streaming reader -> let pandas decide
+    return _parse_workbook_pandas(fileobj_or_path, sheets)
+
+def _as_payload(src):
+    # process pool jobs need something picklable: a path or the raw bytes
+    return src.getvalue() if hasattr(src, "getvalue") else src
+
+def _open_payload(payload):
+    return io.BytesIO(payload) if isinstance(payload, (bytes, bytearray)) else payload
+
+def _sheet_names(payload)->List[str]:
+    # read-only open only reads the workbook manifest, not the sheets
+    try:
+        wb = _open_stream(payload)
+    except Exception:
+        return pd.ExcelFile(_open_payload(payload)).sheet_names
+    try:
+        return list(wb.sheetnames)
+    finally:
+        wb.close()
+
+def _parse_group_job(payload, sheets: List[str])->Dict[str, pd.DataFrame]:
+    # one workbook open per job, however many of its sheets the job holds
+    return parse_workbook(_open_payload(payload), set(sheets))
+
+def _sheet_groups(names: List[str], n: int)->List[List[str]]:
+    # round-robin split into at most n non-empty groups
+    n = max(1, min(n, len(names)))
+    return [names[g::n] for g in range(n) if names[g::n]]
+
+def parse_workbooks(srcs: List, workers: Optional[int]=None,
+                    only: Optional[List[Optional[Set[str]]]]=None)->List[Dict[str,pd.DataFrame]]:
+    # fan the workbooks out to a process pool, each split into sheet groups in proportion to its sheet count,
+    # so every job opens its workbook once; on-disk sources travel as paths, uploads as bytes.
+    # Merged back in sheet order. only[i] restricts workbook i to a set of sheet names
+    workers = PARSE_WORKERS if workers is None else workers
+    only = only or [None]*len(srcs)
+    if workers <= 1:
+        return [parse_workbook(src, sheets) for src, sheets in zip(srcs, only)]
+    order = {}
+    for i, src in enumerate(srcs):
+        try:
+            order[i] = [s for s in _sheet_names(_as_payload(src)) if only[i] is None or s in only[i]]
+        except Exception:
+            continue
+    total = sum(len(names) for names in order.values()) or 1
+    jobs = [(i, _as_payload(srcs[i]), group) for i, names in order.items()
+            for group in _sheet_groups(names, round(workers * len(names) / total))]
+    outs = [{} for _ in srcs]
+    if not jobs:
+        return outs
+    parsed: Dict[int, Dict[str, pd.DataFrame]] = {i: {} for i in order}
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+        futs = [(i, pool.submit(_parse_group_job, payload, group)) for i, payload, group in jobs]
+        for i, fut in futs:
+            parsed[i].update(fut.result())
+    for i, names in order.items():
+        outs[i] = {s: parsed[i][s] for s in names if s in parsed[i]}
+    return outs
+
+def _src_bytes(src)->int:
+    if isinstance(src, (str, os.PathLike)):
+        try:
+            return os.path.getsize(src)
+        except OSError:
+            return 0
+    return len(src.getvalue()) if hasattr(src, "getvalue") else 0
+
+def _sheet_key(fp: str)->str:
+    return f"sheet-{fp}-{ALIAS_VERSION}"
+
+def parse_workbooks_cached(srcs: List, workers: Optional[int]=None)->List[Dict[str,pd.DataFrame]]:
+    # on-disk columnar cache. xlsx sources are cached per sheet fingerprint, so a re-exported
+    # workbook only reparses the sheets whose content changed; anything else is cached whole
+    # on its content hash. Returned frames carry attrs["fingerprint"] for per-sheet reuse downstream.
+    outs: List = [None]*len(srcs)
+    fps: Dict[int, Dict[str,str]] = {}
+    keys: Dict[int, Optional[str]] = {}
+    todo: Dict[int, Optional[Set[str]]] = {}
+    with perf.span("cache_lookup", bytes=sum(_src_bytes(src) for src in srcs)):
+        for i, src in enumerate(srcs):
+            f = sheet_fingerprints(src) if INCREMENTAL else None
+            if f is not None:
+                fps[i] = f
+                outs[i] = {s: disk_cache.get(_sheet_key(fp)) for s, fp in f.items()}
+                missing = {s for s, hit in outs[i].items() if hit is None}
+                perf.count("sheet_cache.hit", len(f) - len(missing))
+                perf.count("sheet_cache.miss", len(missing))
+                if missing:
+                    todo[i] = missing
+                continue
+            digest = disk_cache.content_hash(src)
+            keys[i] = f"{digest}-{ALIAS_VERSION}" if digest else None
+            outs[i] = disk_cache.get(keys[i]) if keys[i] else None
+            perf.count("workbook_cache.miss" if outs[i] is None else "workbook_cache.hit")
+            if outs[i] is None:
+                todo[i] = None
+    order = list(todo)
+    with perf.span("parse", bytes=sum(_src_bytes(srcs[i]) for i in order)) as sp:
+        parsed = dict(zip(order, parse_workbooks([srcs[i] for i in order], workers, only=[todo[i] for i in order])))
+        sp["rows"] = sum(len(sdf) for out in parsed.values() for sdf in out.values())
+    written = False
+    for i in range(len(srcs)):
+        if i in fps:
+            out = {}
+            for s, fp in fps[i].items():
+                got = outs[i][s]
+                if got is None:
+                    got = {s: parsed[i][s]} if s in parsed[i] else {}
+                    disk_cache.put(_sheet_key(fp), got, evict_after=False)  # {} records "nothing mapped on this sheet"
+                    written = True
+                if s in got:
+                    got[s].attrs["fingerprint"] = fp
+                    out[s] = got[s]
+            outs[i] = out
+            continue
+        if outs[i] is None:
+            outs[i] = parsed[i]
+            if keys[i] and outs[i]:
+                disk_cache.put(keys[i], outs[i], evict_after=False)
+                written = True
+        for s, sdf in outs[i].items():
+            if keys[i]:
+                sdf.attrs["fingerprint"] = f"{keys[i]}:{s}"
+    if written:
+        disk_cache.evict()  # once per load rather than per sheet entry
+    return outs
+
+DIM_COLS = ["customer","product","supplier","component","week","round"]
+CATEGORY_COLS = DIM_COLS + ["plant","warehouse","__sheet"]
+KPI_COLS = [k for k in ALIAS if k not in CATEGORY_COLS and k != "date"]
+CUBE_DIMS = DIM_COLS + ["plant","warehouse"]
+
+# typed sheets kept for build_fact reuse. Each entry is one more copy of its rows next to the raw sheets and the
+# fact table that st.cache_resource already holds, so the default only covers small and medium sheets: raise it to
+# trade memory for faster reloads of big re-exported workbooks, 0 turns the memo off
+FACT_MEMO_ROWS = int(os.environ.get("TFC_FACT_MEMO_ROWS", "200000"))
+_FACT_MEMO: "OrderedDict[str, Tuple[pd.DataFrame, Dict[str, str], Dict[str, frozenset]]]" = OrderedDict()
+_fact_lock = threading.Lock()  # session threads and the watcher share the memo
+
+def _typed_sheet(sdf: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, str], Dict[str, frozenset]]:
+    # one sheet with numeric KPIs as float64 and single-type category columns as categoricals, plus the raw
+    # dtype and value types of each category column; memoized on attrs["fingerprint"] so a reload only
+    # retypes the sheets that changed
+    fp = sdf.attrs.get("fingerprint")
+    with _fact_lock:
+        hit = _FACT_MEMO.get(fp) if fp else None
+        if hit is not None:
+            _FACT_MEMO.move_to_end(fp)
+            return hit
+    cols, dtypes, types = {}, {}, {}
+    for c in sdf.columns:
+        if c in KPI_COLS:
+            cols[c] = pd.to_numeric(sdf[c], errors="coerce").astype("float64")
+        elif c in CATEGORY_COLS:
+            dtypes[c], types[c] = str(sdf[c].dtype), frozenset(sdf[c].dropna().map(type))
+            cols[c] = sdf[c].astype("category") if len(types[c]) <= 1 else sdf[c]
+        else:
+            cols[c] = sdf[c]
+    entry = (pd.DataFrame(cols, index=sdf.index), dtypes, types)
+    if fp and len(sdf) <= FACT_MEMO_ROWS:
+        with _fact_lock:
+            _FACT_MEMO[fp] = entry
+            while sum(len(e[0]) for e in _FACT_MEMO.values()) > FACT_MEMO_ROWS:
+                _FACT_MEMO.popitem(last=False)
+    return entry
+
+def build_fact(sheets: Dict[str,pd.DataFrame])->pd.DataFrame:
+    # one concatenated table per source: numeric KPIs as float64, dimensions as categoricals. Typing is done
+    # per sheet (memoized, see _typed_sheet); a category column present in every sheet with one dtype and one
+    # value type is concatenated as a categorical over the union of categories, any other column is typed on
+    # the concatenated rows as before. The concat itself, the FilterIndex and the joins still run over every
+    # row on each load (they are a small share of build time next to parsing and typing)
+    if not sheets:
+        return pd.DataFrame()
+    typed = [_typed_sheet(sdf) for sdf in sheets.values()]
+    frames = [f for f, _, _ in typed]
+    cols: List[dict] = [{} for _ in frames]
+    for c in dict.fromkeys(c for _, dtypes, _ in typed for c in dtypes):
+        kinds = {dtypes[c] for _, dtypes, _ in typed if c in dtypes}
+        # sheets without the column add NaN rows, which only object/float columns absorb without a dtype change
+        everywhere = all(c in dtypes for _, dtypes, _ in typed) or kinds <= {"object", "float64"}
+        if len(kinds) == 1 and everywhere and len(frozenset().union(*(t.get(c, frozenset()) for _, _, t in typed))) <= 1:
+            cats = pd.api.types.union_categoricals([f[c] for f in frames if c in f.columns], sort_categories=True).dtype
+            for f, out in zip(frames, cols):
+                out[c] = f[c].cat.set_categories(cats.categories) if c in f.columns \
+                    else pd.Categorical.from_codes(np.full(len(f), -1), dtype=cats)
+        else:
+            for f, sdf, out in zip(frames, sheets.values(), cols):
+                if c in f.columns:
+                    out[c] = sdf[c]
+    frames = [f.assign(**out) for f, out in zip(frames, cols)]
+    order = list(dict.fromkeys(c for sdf in sheets.values() for c in sdf.columns))
+    df = pd.concat(frames, ignore_index=True, sort=False)[order]
+    for c in df.columns:
+        if c in CATEGORY_COLS and not isinstance(df[c].dtype, pd.CategoricalDtype) and df[c].dropna().map(type).nunique() <= 1:
+            # mixed-type columns stay object: Arrow (st.dataframe) can't encode their categories
+            df[c] = df[c].astype("category")
+    return df
+
+def build_cube(sheets: Dict[str,pd.DataFrame]):
+    # KPI aggregates for the pages: in-memory partials, or SQL over per-sheet Parquet with TFC_BACKEND=duckdb;
+    # the weighted-mean inputs of kpi_defs are aggregated in the same pass
+    sheets = {k: kpi_defs.with_weights(f) for k, f in sheets.items()}
+    metrics = KPI_COLS + kpi_defs.WEIGHT_COLS
+    if BACKEND == "duckdb":
+        if sql_backend.duckdb is not None:
+            return sql_backend.SqlCube.from_sheets(sheets, CUBE_DIMS, metrics, tag=ALIAS_VERSION)
+        perf.count("backend.duckdb_missing")  # fall back rather than fail the page
+    return KpiCube.from_sheets(sheets, CUBE_DIMS, metrics)
+
+def load_data(src_ops, src_fin, workers: Optional[int]=None)->Dict[str,dict]:
+    # parsed sheets, fact tables, filter indexes, KPI cubes, OPS<->FIN join indexes and KPI engines for one OPS/FIN pair (either may be None).
+    # With TFC_BACKEND=duckdb only the KPI aggregates move to Parquet: the pages' filter options, raw-row
+    # charts and drilldowns still read the in-memory facts, so the dataset must fit in memory either way
+    data={"OPS":{}, "FIN":{}}
+    names = [n for n, src in (("OPS", src_ops), ("FIN", src_fin)) if src is not None]
+    srcs = [src for src in (src_ops, src_fin) if src is not None]
+    for n, out in zip(names, parse_workbooks_cached(srcs, workers)):
+        data[n]=out
+    with perf.span("build_fact") as sp:
+        data["facts"]={n: build_fact(data[n]) for n in ("OPS","FIN")}
+        sp["rows"] = sum(len(f) for f in data["facts"].values())
+        sp["bytes"] = sum(int(f.memory_usage(deep=False).sum()) for f in data["facts"].values())
+    with perf.span("build_index", rows=sp["rows"]):
+        data["index"]={n: FilterIndex(f, DIM_COLS) for n, f in data["facts"].items()}
+    with perf.span("build_cube", rows=sp["rows"]) as cp:
+        data["cube"]={n: build_cube(data[n]) for n in ("OPS","FIN")}
+        cp["cells"] = sum(len(c.parts) for c in data["cube"].values() if hasattr(c, "parts"))
+    with perf.span("build_joins"):
+        data["joins"]=build_joins(data["cube"]["OPS"], data["cube"]["FIN"])
+    data["kpis"]={n: kpi_defs.KpiEngine(c) for n, c in data["cube"].items()}
+    return data
+
+def coerce_num(df: pd.DataFrame, cols: List[str]) -> pd.DataFrame:
+    for c in cols:
+        if c in df.columns:
+            df[c] = pd.to_numeric(df[c], errors="coerce")
+    return df
@@ -0,0 +1,96 @@
+
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from typing import Dict, Optional, Sequence
+from kpi_cube import ROWS
+from kpi_defs import KPIS
+
+JOIN_DIMS = ["round", "week", "customer", "product", "supplier"]  # keys OPS and FIN sheets can share
+_MEMO_MAX = 256
+
+def _sel_key(sel: Optional[Dict[str, list]]) -> tuple:
+    return tuple(sorted((c, tuple(picked)) for c, picked in (sel or {}).items() if picked))
+
+def _vocab(*cols: pd.Series) -> pd.Index:
+    # distinct non-null keys of both sources, sorted like groupby output where the types allow it
+    keys = pd.Index(pd.unique(np.concatenate([np.asarray(c, dtype=object) for c in cols]))).dropna()
+    try:
+        return keys.sort_values()
+    except TypeError:
+        return keys
+
+def _how(metric: str) -> str:
+    # sum or mean for a plain registry column; row counts add up
+    how = KPIS[metric][0] if metric in KPIS else "sum"
+    if how not in ("sum", "mean"):
+        raise ValueError(f"{metric} is a derived KPI; joins pair plain columns")
+    return how
+
+class JoinIndex:
+    # OPS and FIN cube cells coded against one shared key vocabulary for a dimension, built once per load;
+    # a KPI-vs-financial table is then a masked bincount per side instead of two groupbys and a concat
+    def __init__(self, dim: str, ops, fin):
+        self.dim, self.ops, self.fin = dim, ops, fin
+        self.indexed = hasattr(ops, "parts") and hasattr(fin, "parts")  # SqlCube answers through by()
+        self.keys = self.ops_codes = self.fin_codes = None
+        if self.indexed:
+            self.keys = _vocab(ops.parts[dim], fin.parts[dim])
+            self.ops_codes = self.keys.get_indexer(pd.Index(np.asarray(ops.parts[dim], dtype=object)))
+            self.fin_codes = self.keys.get_indexer(pd.Index(np.asarray(fin.parts[dim], dtype=object)))
+        self._memo: "OrderedDict[tuple, pd.DataFrame]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def freeze(self) -> "JoinIndex":
+        for arr in (self.ops_codes, self.fin_codes):
+            if arr is not None:
+                arr.flags.writeable = False
+        return self
+
+    def _side(self, cube, codes: np.ndarray, metric: str, how: str, sel) -> np.ndarray:
+        # metric per key (NaN where the key has no value), same rules as KpiCube.by
+        m = cube.mask(sel) & (codes >= 0)
+        c, p, size = codes[m], cube.parts, len(self.keys)
+        if metric == ROWS:
+            n = np.bincount(c, weights=p[ROWS].to_numpy(dtype="float64")[m], minlength=size)
+            return np.where(n > 0, n, np.nan)
+        sums = np.bincount(c, weights=p[f"{metric}__sum"].to_numpy(dtype="float64")[m], minlength=size)
+        if how == "sum":
+            return np.where(np.bincount(c, minlength=size) > 0, sums, np.nan)
+        n = np.bincount(c, weights=p[f"{metric}__n"].to_numpy(dtype="float64")[m], minlength=size)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(n > 0, sums / n, np.nan)
+
+    def pair(self, ops_metric: str, fin_metric: str, ops_how: Optional[str] = None, fin_how: Optional[str] = None,
+             osel: Optional[Dict[str, list]] = None, fsel: Optional[Dict[str, list]] = None) -> pd.DataFrame:
+        # [dim, ops_metric, fin_metric] for keys with a value on both sides, i.e.
+        # concat([ops.by(dim, ops_metric), fin.by(dim, fin_metric)], axis=1).dropna().reset_index();
+        # each side aggregates the way kpi_defs.KPIS declares its column unless how is given
+        ops_how, fin_how = ops_how or _how(ops_metric), fin_how or _how(fin_metric)
+        memo_key = (ops_metric, ops_how, fin_metric, fin_how, _sel_key(osel), _sel_key(fsel))
+        with self._lock:
+            if memo_key in self._memo:
+                self._memo.move_to_end(memo_key)
+                return self._memo[memo_key]
+        known = (ops_metric == ROWS or self.ops.has(ops_metric)) and (fin_metric == ROWS or self.fin.has(fin_metric))
+        if not known:
+            out = pd.DataFrame(columns=[self.dim, ops_metric, fin_metric])
+        elif self.indexed:
+            a = self._side(self.ops, self.ops_codes, ops_metric, ops_how, osel)
+            b = self._side(self.fin, self.fin_codes, fin_metric, fin_how, fsel)
+            both = ~(np.isnan(a) | np.isnan(b))
+            out = pd.DataFrame({self.dim: self.keys[both], ops_metric: a[both], fin_metric: b[both]})
+        else:
+            a = self.ops.by(self.dim, ops_metric, ops_how, osel).set_index(self.dim)[ops_metric]
+            b = self.fin.by(self.dim, fin_metric, fin_how, fsel).set_index(self.dim)[fin_metric]
+            out = pd.concat([a, b], axis=1).dropna().rename_axis(self.dim).reset_index()
+        with self._lock:
+            self._memo[memo_key] = out
+            while len(self._memo) > _MEMO_MAX:
+                self._memo.popitem(last=False)
+        return out
+
+def build_joins(ops, fin, dims: Sequence[str] = JOIN_DIMS) -> Dict[str, JoinIndex]:
+    # one JoinIndex per dimension both cubes carry
+    return {d: JoinIndex(d, ops, fin) for d in dims if d in ops.keys and d in fin.keys}
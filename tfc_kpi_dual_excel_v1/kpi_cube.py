@@ -0,0 +1,139 @@
+
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Sequence, Union
+
+ROWS = "__rows"  # pseudo-metric: row count per cell
+
+_PARTIALS_MEMO: "OrderedDict[tuple, pd.DataFrame]" = OrderedDict()
+_PARTIALS_MAX = 512
+_partials_lock = threading.Lock()  # session threads and the watcher share the memo
+
+def _partials(frame: pd.DataFrame, keys: List[str], metrics: List[str]) -> pd.DataFrame:
+    vals = frame[metrics]
+    if not keys:
+        row = {**vals.sum().add_suffix("__sum"), **vals.count().add_suffix("__n"), ROWS: len(frame)}
+        return pd.DataFrame([row])
+    g = vals.groupby([frame[k] for k in keys], observed=True, dropna=False, sort=False)
+    parts = pd.concat([g.sum().add_suffix("__sum"), g.count().add_suffix("__n"), g.size().rename(ROWS)], axis=1)
+    return parts.reset_index()
+
+class KpiCube:
+    # sum/count partials per KPI at the finest grain (round x week x every dimension);
+    # tiles and per-dimension charts roll these up instead of rescanning fact rows
+    def __init__(self, fact: pd.DataFrame, dims: Sequence[str], metrics: Sequence[str]):
+        self.keys = [c for c in dims if c in fact.columns]
+        self.metrics = [m for m in metrics if m in fact.columns]
+        if fact.empty:
+            self.parts = pd.DataFrame(columns=self.keys + self._cols(self.metrics) + [ROWS])
+            return
+        self.parts = _partials(fact, self.keys, self.metrics)
+
+    @classmethod
+    def from_sheets(cls, sheets: Dict[str, pd.DataFrame], dims: Sequence[str], metrics: Sequence[str]) -> "KpiCube":
+        # same cube as KpiCube(concat(sheets)), but partials are computed per sheet and memoized
+        # on attrs["fingerprint"], so reloading a re-exported workbook only aggregates changed sheets
+        frames = [f for f in sheets.values() if not f.empty]
+        present = set().union(*(f.columns for f in frames)) if frames else set()
+        cube = cls.__new__(cls)
+        cube.keys = [c for c in dims if c in present]
+        cube.metrics = [m for m in metrics if m in present]
+        if not frames:
+            cube.parts = pd.DataFrame(columns=cube.keys + cls._cols(cube.metrics) + [ROWS])
+            return cube
+        pieces = [cls._sheet_partials(f, dims, metrics) for f in frames]
+        parts = pd.concat(pieces, ignore_index=True, sort=False)
+        cols = cls._cols(cube.metrics)
+        parts[cols + [ROWS]] = parts.reindex(columns=cols + [ROWS]).fillna(0)
+        if cube.keys:
+            parts = parts.groupby(cube.keys, dropna=False, sort=False)[cols + [ROWS]].sum().reset_index()
+            for k in cube.keys:
+                if parts[k].dropna().map(type).nunique() <= 1:
+                    parts[k] = parts[k].astype("category")  # same dtype rule as the fact table
+        else:
+            parts = parts[cols + [ROWS]].sum().to_frame().T
+        parts[ROWS] = parts[ROWS].astype("int64")
+        cube.parts = parts
+        return cube
+
+    @staticmethod
+    def _sheet_partials(frame: pd.DataFrame, dims: Sequence[str], metrics: Sequence[str]) -> pd.DataFrame:
+        keys = [c for c in dims if c in frame.columns]
+        ms = [m for m in metrics if m in frame.columns]
+        fp = frame.attrs.get("fingerprint")
+        memo_key = (fp, tuple(dims), tuple(metrics)) if fp else None
+        if memo_key:
+            with _partials_lock:
+                hit = _PARTIALS_MEMO.get(memo_key)
+                if hit is not None:
+                    _PARTIALS_MEMO.move_to_end(memo_key)
+                    return hit
+        vals = frame[keys].assign(**{m: pd.to_numeric(frame[m], errors="coerce").astype("float64") for m in ms})
+        parts = _partials(vals, keys, ms)
+        if memo_key:
+            with _partials_lock:
+                _PARTIALS_MEMO[memo_key] = parts
+                while len(_PARTIALS_MEMO) > _PARTIALS_MAX:
+                    _PARTIALS_MEMO.popitem(last=False)
+        return parts
+
+    @staticmethod
+    def _cols(metrics: Sequence[str]) -> List[str]:
+        return [f"{m}__sum" for m in metrics] + [f"{m}__n" for m in metrics]
+
+    def has(self, metric: str) -> bool:
+        return metric in self.metrics
+
+    def mask(self, sel: Optional[Dict[str, list]] = None) -> np.ndarray:
+        # same semantics as the page filters: empty selections and unknown columns are ignored
+        m = np.ones(len(self.parts), dtype=bool)
+        for c, picked in (sel or {}).items():
+            if c in self.keys and picked:
+                m &= self.parts[c].isin(picked).to_numpy()
+        return m
+
+    def _value(self, sums, counts, how: str):
+        if how == "sum":
+            return sums
+        if isinstance(counts, pd.Series):
+            return sums / counts.where(counts > 0)
+        return sums / counts if counts else np.nan
+
+    def _need(self, metric: str) -> List[str]:
+        return [ROWS] if metric == ROWS else [f"{metric}__sum", f"{metric}__n"]
+
+    def _select(self, sel: Optional[Dict[str, list]]) -> pd.DataFrame:
+        m = self.mask(sel)
+        return self.parts if m.all() else self.parts[m]
+
+    def total(self, metric: str, how: str = "mean", sel: Optional[Dict[str, list]] = None) -> float:
+        p = self._select(sel)
+        if metric == ROWS:
+            return float(p[ROWS].sum())
+        return self._value(p[f"{metric}__sum"].sum(), p[f"{metric}__n"].sum(), how)
+
+    def by(self, dims: Union[str, List[str]], metrics: Union[str, List[str]], how: str = "mean",
+           sel: Optional[Dict[str, list]] = None) -> pd.DataFrame:
+        # equivalent of fact.groupby(dims, dropna=True, observed=True)[metrics].<how>().reset_index()
+        dims = [dims] if isinstance(dims, str) else list(dims)
+        metrics = [metrics] if isinstance(metrics, str) else list(metrics)
+        p = self._select(sel)
+        g = p.groupby(dims, observed=True, dropna=True)[sorted({c for m in metrics for c in self._need(m)})].sum()
+        out = pd.DataFrame({m: g[ROWS] if m == ROWS else self._value(g[f"{m}__sum"], g[f"{m}__n"], how)
+                            for m in metrics}, index=g.index)
+        return out.reset_index()
+
+    def partials(self, dims: Sequence[str], metrics: Sequence[str], sel: Optional[Dict[str, list]] = None) -> pd.DataFrame:
+        # per-group sums and non-null counts (m__sum, m__n) plus ROWS, for callers that combine metrics themselves
+        p = self._select(sel)
+        cols = self._cols([m for m in metrics if m in self.metrics]) + [ROWS]
+        if not dims:
+            return p[cols].sum().to_frame().T
+        return p.groupby(list(dims), observed=True, dropna=True)[cols].sum().reset_index()
+
+    def top(self, dim: str, metric: str, how: str = "sum", n: int = 20,
+            sel: Optional[Dict[str, list]] = None) -> pd.DataFrame:
+        # the n largest groups of dim by metric (Finance "Top Contributors")
+        return self.by(dim, metric, how, sel).sort_values(metric, ascending=False).head(n)
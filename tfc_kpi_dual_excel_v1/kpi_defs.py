@@ -0,0 +1,205 @@
+
+import operator, re, threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Sequence, Tuple
+from kpi_cube import ROWS
+
+# KPI registry over the ALIAS canonical columns: name -> (how, expression, weight)
+#   sum / mean : plain aggregate of the column named by expression
+#   wmean      : mean of expression weighted by the weight column, sum(x*w) / sum(w) over rows with both
+#   expr       : arithmetic over other KPIs (+ - * / and numbers, usual precedence, no parentheses),
+#                evaluated on their aggregated values (ratios of sums, differences)
+KPIS: Dict[str, Tuple[str, str, Optional[str]]] = {}
+for _c in ["order_qty", "delivered_qty", "backorder_qty", "revenue", "discount", "cogs", "indirect_cost",
+           "operating_profit", "capital_employed", "forecast", "obsolescence_qty", "obsolescence_value"]:
+    KPIS[_c] = ("sum", _c, None)
+for _c in ["price", "roi_pct", "service_level_pct", "shelf_life_days", "forecast_error_pct",
+           "component_availability_pct", "product_availability_pct", "delivery_reliability_pct", "rejection_pct",
+           "component_obsolete_pct", "raw_material_cost_pct", "inbound_cube_util_pct", "outbound_cube_util_pct",
+           "mixing_util_pct", "bottling_util_pct", "plan_adherence_pct"]:
+    KPIS[_c] = ("mean", _c, None)
+KPIS.update({
+    "operating_profit_calc": ("expr", "revenue - cogs - indirect_cost", None),
+    "gross_profit": ("expr", "revenue - cogs", None),
+    "gross_margin_pct": ("expr", "100 * gross_profit / revenue", None),
+    "operating_margin_pct": ("expr", "100 * operating_profit / revenue", None),
+    "roi_calc_pct": ("expr", "100 * operating_profit / capital_employed", None),
+    "roi_weighted_pct": ("wmean", "roi_pct", "capital_employed"),
+    "fill_rate_pct": ("expr", "100 * delivered_qty / order_qty", None),
+    "backorder_rate_pct": ("expr", "100 * backorder_qty / order_qty", None),
+    "service_level_weighted_pct": ("wmean", "service_level_pct", "order_qty"),
+})
+# used when a workbook lacks the KPI's own column: another KPI, else a constant (no indirect cost column
+# means no indirect cost, so operating_profit_calc is revenue - cogs there)
+FALLBACKS = {"operating_profit": "operating_profit_calc", "roi_pct": "roi_calc_pct"}
+DEFAULTS = {"indirect_cost": 0.0}
+
+# (page, tile label, source, KPI, format) - the st.metric tiles of each page, shared by the pages and kpi_engine
+TILES = [
+    ("Purchase", "Delivery Reliability %", "OPS", "delivery_reliability_pct", "{:.2f}%"),
+    ("Purchase", "Rejection %", "OPS", "rejection_pct", "{:.2f}%"),
+    ("Purchase", "Component Obsolete %", "OPS", "component_obsolete_pct", "{:.2f}%"),
+    ("Purchase", "RM Cost %", "OPS", "raw_material_cost_pct", "{:.2f}%"),
+    ("Purchase", "Operating Profit", "FIN", "operating_profit", "{:,.0f}"),
+    ("Purchase", "ROI %", "FIN", "roi_pct", "{:.2f}%"),
+    ("Sales", "Service Level %", "OPS", "service_level_pct", "{:.2f}%"),
+    ("Sales", "Shelf Life (days)", "OPS", "shelf_life_days", "{:.1f}"),
+    ("Sales", "Forecast Error %", "OPS", "forecast_error_pct", "{:.2f}%"),
+    ("Sales", "Obsolescence Value", "OPS", "obsolescence_value", "{:,.0f}"),
+    ("Sales", "Operating Profit", "FIN", "operating_profit", "{:,.0f}"),
+    ("Sales", "ROI %", "FIN", "roi_pct", "{:.2f}%"),
+    ("SCM", "Product Availability %", "OPS", "product_availability_pct", "{:.2f}%"),
+    ("SCM", "Component Availability %", "OPS", "component_availability_pct", "{:.2f}%"),
+    ("SCM", "Revenue", "FIN", "revenue", "{:,.0f}"),
+    ("Operations", "Inbound Util %", "OPS", "inbound_cube_util_pct", "{:.2f}%"),
+    ("Operations", "Outbound Util %", "OPS", "outbound_cube_util_pct", "{:.2f}%"),
+    ("Operations", "Mixing Util %", "OPS", "mixing_util_pct", "{:.2f}%"),
+    ("Operations", "Bottling Util %", "OPS", "bottling_util_pct", "{:.2f}%"),
+    ("Operations", "Plan Adherence %", "OPS", "plan_adherence_pct", "{:.2f}%"),
+    ("Finance", "Revenue", "FIN", "revenue", "{:,.0f}"),
+    ("Finance", "COGS", "FIN", "cogs", "{:,.0f}"),
+    ("Finance", "Indirect", "FIN", "indirect_cost", "{:,.0f}"),
+    ("Finance", "Operating Profit", "FIN", "operating_profit", "{:,.0f}"),
+    ("Finance", "ROI %", "FIN", "roi_pct", "{:.2f}%"),
+]
+
+_BINARY = {"+": (1, operator.add), "-": (1, operator.sub), "*": (2, operator.mul), "/": (2, operator.truediv)}
+_TOKEN = re.compile(r"\s*(?:(\d+(?:\.\d+)?)|([A-Za-z_]\w*)|(\S))")
+
+def _compile(expr: str) -> list:
+    # infix -> postfix program of numbers (float), KPI names and operator symbols
+    out, ops, operand = [], [], False
+    for num, name, sym in _TOKEN.findall(expr):
+        if num or name:
+            if operand:
+                raise ValueError(f"KPI expression {expr!r}: missing operator before {num or name!r}")
+            out.append(float(num) if num else name)
+        elif sym in _BINARY and operand:
+            while ops and _BINARY[ops[-1]][0] >= _BINARY[sym][0]:
+                out.append(ops.pop())
+            ops.append(sym)
+        else:
+            raise ValueError(f"KPI expression {expr!r}: unexpected {sym!r}")
+        operand = not sym
+    if not operand:
+        raise ValueError(f"KPI expression {expr!r}: ends with an operator")
+    return out + ops[::-1]
+
+def _run(program: list, scope: dict):
+    stack = []
+    for t in program:
+        if isinstance(t, str) and t in _BINARY:
+            b = stack.pop()
+            stack.append(_BINARY[t][1](stack.pop(), b))
+        else:
+            stack.append(scope[t] if isinstance(t, str) else t)
+    return stack[0]
+
+_PROGRAMS = {name: _compile(expr) for name, (how, expr, _) in KPIS.items() if how == "expr"}
+_MEMO_MAX = 64
+
+def deps(name: str) -> List[str]:
+    how, expr, weight = KPIS[name]
+    return list(dict.fromkeys(t for t in _PROGRAMS[name] if isinstance(t, str) and t not in _BINARY)) if how == "expr" else []
+
+def weight_cols(x: str, w: str) -> Tuple[str, str]:
+    # extra cube metrics for a weighted mean: x*w, and w where x is present
+    return f"{x}*{w}", f"{w}|{x}"
+
+WEIGHTED = sorted({(expr, weight) for how, expr, weight in KPIS.values() if how == "wmean"})
+WEIGHT_COLS = [c for x, w in WEIGHTED for c in weight_cols(x, w)]
+
+def with_weights(frame: pd.DataFrame) -> pd.DataFrame:
+    # adds the weighted-mean numerator/denominator columns a sheet can feed; they ride along in the
+    # cube's one groupby pass, so weighted KPIs cost no extra pass over the rows
+    extra = {}
+    for x, w in WEIGHTED:
+        if x in frame.columns and w in frame.columns:
+            xv = pd.to_numeric(frame[x], errors="coerce").astype("float64")
+            wv = pd.to_numeric(frame[w], errors="coerce").astype("float64").where(xv.notna())
+            num, den = weight_cols(x, w)
+            extra[num], extra[den] = xv * wv, wv
+    return frame.assign(**extra) if extra else frame
+
+def _sel_key(sel: Optional[Dict[str, list]]) -> tuple:
+    return tuple(sorted((c, tuple(picked)) for c, picked in (sel or {}).items() if picked))
+
+class KpiEngine:
+    # evaluates registry KPIs for a slice (selection x grouping dims) of a cube: one partials query per slice,
+    # then every requested KPI and its dependencies vectorized over the groups, memoized per slice
+    def __init__(self, cube):
+        self.cube = cube
+        self._memo: "OrderedDict[tuple, Tuple[pd.DataFrame, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _own(self, name: str, _stack: tuple = ()) -> bool:
+        # the KPI's own definition can be evaluated on this cube (ignoring its fallback)
+        if name in _stack:
+            raise ValueError(f"KPI dependency cycle: {' -> '.join(_stack + (name,))}")
+        how, expr, weight = KPIS[name]
+        if how in ("sum", "mean"):
+            return self.cube.has(expr)
+        if how == "wmean":
+            return all(self.cube.has(c) for c in weight_cols(expr, weight))
+        return all(self.available(d, _stack + (name,)) for d in deps(name))
+
+    def available(self, name: str, _stack: tuple = ()) -> bool:
+        return (self._own(name, _stack) or (name in FALLBACKS and self.available(FALLBACKS[name], _stack + (name,)))
+                or name in DEFAULTS)
+
+    def _slice(self, dims: Tuple[str, ...], sel) -> Tuple[pd.DataFrame, dict]:
+        key = (dims, _sel_key(sel))
+        if key in self._memo:
+            self._memo.move_to_end(key)
+            return self._memo[key]
+        entry = (self.cube.partials(dims, self.cube.metrics, sel), {})
+        self._memo[key] = entry
+        while len(self._memo) > _MEMO_MAX:
+            self._memo.popitem(last=False)
+        return entry
+
+    def _eval(self, name: str, parts: pd.DataFrame, vals: dict) -> pd.Series:
+        if name in vals:
+            return vals[name]
+        if name == ROWS:
+            return parts[ROWS].astype("float64")
+        how, expr, weight = KPIS[name]
+        nan = pd.Series(np.nan, index=parts.index)
+        if not self._own(name):
+            if name in FALLBACKS and self.available(FALLBACKS[name]):
+                v = self._eval(FALLBACKS[name], parts, vals)
+            else:
+                v = pd.Series(DEFAULTS.get(name, np.nan), index=parts.index, dtype="float64")
+        elif how == "sum":
+            v = parts[f"{expr}__sum"].astype("float64")
+        elif how == "mean":
+            n = parts[f"{expr}__n"]
+            v = parts[f"{expr}__sum"] / n.where(n > 0)
+        elif how == "wmean":
+            num, den = weight_cols(expr, weight)
+            d = parts[f"{den}__sum"]
+            v = parts[f"{num}__sum"] / d.where(d != 0)
+        else:
+            scope = {d: self._eval(d, parts, vals) for d in deps(name)}
+            v = _run(_PROGRAMS[name], scope)
+            v = v.replace([np.inf, -np.inf], np.nan) if isinstance(v, pd.Series) else nan + v
+        vals[name] = v
+        return v
+
+    def frame(self, names: Sequence[str], dims: Sequence[str] = (), sel: Optional[Dict[str, list]] = None) -> pd.DataFrame:
+        # [dims + names] per group (one row for no dims); unavailable KPIs are NaN, ROWS is the row count
+        dims = tuple([dims] if isinstance(dims, str) else dims)
+        with self._lock:
+            parts, vals = self._slice(dims, sel)
+            cols = {n: self._eval(n, parts, vals) for n in names}
+        return pd.concat([parts[list(dims)], pd.DataFrame(cols, index=parts.index)], axis=1)
+
+    def total(self, names: Sequence[str], sel: Optional[Dict[str, list]] = None) -> Dict[str, float]:
+        row = self.frame(names, (), sel)
+        return {n: float(row[n].iloc[0]) if len(row) else np.nan for n in names}
+
+    def top(self, name: str, dim: str, n: int = 20, sel: Optional[Dict[str, list]] = None) -> pd.DataFrame:
+        # the n largest groups of dim by a KPI (Finance "Top Contributors")
+        return self.frame([name], dim, sel).sort_values(name, ascending=False).head(n)
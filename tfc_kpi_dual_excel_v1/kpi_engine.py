@@ -0,0 +1,134 @@
+
+import os, re, glob, time, warnings
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from ingest import load_data
+from kpi_defs import KPIS, TILES
+
+# (page, chart, source, dims, KPI) - the grouped bars/heatmaps/scatter inputs of each page; tiles are kpi_defs.TILES
+AGGREGATES = [
+    ("Purchase", "Avg Rejection % by Supplier", "OPS", ["supplier"], "rejection_pct"),
+    ("Purchase", "Component Obsolete % by Supplier", "OPS", ["supplier"], "component_obsolete_pct"),
+    ("Purchase", "RM Cost % by Supplier", "OPS", ["supplier"], "raw_material_cost_pct"),
+    ("Purchase", "Operating Profit by Supplier", "FIN", ["supplier"], "operating_profit"),
+    ("Sales", "Avg Forecast Error % by Customer", "OPS", ["customer"], "forecast_error_pct"),
+    ("Sales", "Obsolescence Value by Customer", "OPS", ["customer"], "obsolescence_value"),
+    ("Sales", "Operating Profit by Customer", "FIN", ["customer"], "operating_profit"),
+    ("Sales", "Service Level vs ROI (Customer)", "OPS", ["customer"], "service_level_pct"),
+    ("Sales", "Service Level vs ROI (Customer)", "FIN", ["customer"], "roi_pct"),
+    ("SCM", "Product Availability Heatmap", "OPS", ["week", "product"], "product_availability_pct"),
+    ("SCM", "Lowest Availability Components", "OPS", ["component"], "component_availability_pct"),
+    ("SCM", "Availability vs Revenue (Product)", "OPS", ["product"], "product_availability_pct"),
+    ("SCM", "Availability vs Revenue (Product)", "FIN", ["product"], "revenue"),
+    ("Operations", "Plan Adherence vs COGS", "OPS", ["week"], "plan_adherence_pct"),
+    ("Operations", "Plan Adherence vs COGS", "FIN", ["week"], "cogs"),
+] + [("Finance", f"{m.replace('_',' ').title()} by Week", "FIN", ["week"], m)
+     for m in ["revenue", "cogs", "indirect_cost", "operating_profit"]] \
+  + [("Finance", "Top Contributors", "FIN", [d], m)
+     for d in ["customer", "product", "supplier", "component", "plant", "warehouse"]
+     for m in ["revenue", "operating_profit", "cogs"]]
+
+RESULT_COLS = ["team", "ops_file", "fin_file", "page", "kpi", "source", "metric", "how", "dims", "key", "value"]
+
+def default_selection(index, last_weeks: int = 0) -> Dict[str, list]:
+    # every round; the last N weeks when last_weeks > 0 (12 reproduces the pages' default filter)
+    rounds, weeks = sorted(index.options("round")), sorted(index.options("week"))
+    if last_weeks and len(weeks) > last_weeks:
+        weeks = weeks[-last_weeks:]
+    return {"round": rounds, "week": weeks}
+
+def score(data: Dict[str, dict], last_weeks: int = 0) -> pd.DataFrame:
+    # every tile and grouped aggregate the pages draw, as one long table, all through the KPI registry
+    sel = {n: default_selection(data["index"][n], last_weeks) for n in ("OPS", "FIN")}
+    kpis = data["kpis"]
+    totals = {n: kpis[n].total([t[3] for t in TILES if t[2] == n and kpis[n].available(t[3])], sel[n])
+              for n in ("OPS", "FIN")}
+    rows = [(page, label, src, kpi, KPIS[kpi][0], "", "", totals[src][kpi])
+            for page, label, src, kpi, _ in TILES if kpi in totals[src]]
+    for page, chart, src, dims, kpi in AGGREGATES:
+        if not kpis[src].available(kpi) or any(d not in kpis[src].cube.keys for d in dims):
+            continue
+        agg = kpis[src].frame([kpi], dims, sel[src])
+        keys = agg[dims].astype(str).agg(" | ".join, axis=1) if len(agg) else []
+        rows += [(page, chart, src, kpi, KPIS[kpi][0], ",".join(dims), k, float(v)) for k, v in zip(keys, agg[kpi])]
+    return pd.DataFrame(rows, columns=RESULT_COLS[3:])
+
+def score_pair(team: str, ops: Optional[str], fin: Optional[str], last_weeks: int = 0) -> pd.DataFrame:
+    out = score(load_data(ops, fin), last_weeks)
+    out.insert(0, "team", team)
+    out.insert(1, "ops_file", ops or "")
+    out.insert(2, "fin_file", fin or "")
+    return out
+
+# role tokens only count as whole name parts: at the start/end or between " ", "_", "-", "." separators,
+# so "final_ops.xlsx" and "refined.xlsx" are not FIN workbooks and "shops_fin" keeps its "shops"
+_SEP = r"[ _\-.]"
+_FIN_NAME = re.compile(rf"(?:^|{_SEP})fin(?:ance)?(?:report)?(?=$|{_SEP})", re.I)
+_ROLE_TOKEN = re.compile(rf"(?:^|{_SEP}+)(?:operations|ops|finance|fin)(?:report)?(?:$|{_SEP}+)", re.I)
+
+def discover_pairs(root: str) -> List[Tuple[str, Optional[str], Optional[str]]]:
+    # a folder holding one OPS and one FIN workbook is one team (named after the folder);
+    # otherwise files are paired by name with the ops/fin token removed (teamA_ops.xlsx + teamA_fin.xlsx).
+    # A second OPS or FIN file for the same team is warned about and kept as its own unpaired entry
+    pairs = []
+    for d in [root] + sorted(p for p in glob.glob(os.path.join(root, "*")) if os.path.isdir(p)):
+        files = sorted(glob.glob(os.path.join(d, "*.xlsx")))
+        fins = [f for f in files if _FIN_NAME.search(os.path.basename(f))]
+        opss = [f for f in files if f not in fins]
+        if len(fins) == 1 and len(opss) == 1:
+            pairs.append((os.path.basename(os.path.abspath(d)), opss[0], fins[0]))
+            continue
+        teams: Dict[str, list] = {}
+        for f in files:
+            # the token and its separators become one "_", so teamA_ops_round3 and teamA-fin-round3 are "teamA_round3"
+            stem = _ROLE_TOKEN.sub("_", os.path.splitext(os.path.basename(f))[0]).strip("_- .") or os.path.basename(d)
+            teams.setdefault(stem, [[], []])[1 if f in fins else 0].append(f)
+        for t, (o, f) in sorted(teams.items()):
+            pairs.append((t, o[0] if o else None, f[0] if f else None))
+            for role, extra in (("OPS", o[1:]), ("FIN", f[1:])):
+                if extra:
+                    warnings.warn(f"{d}: team {t!r} has {len(extra) + 1} {role} workbooks; pairing "
+                                  f"{os.path.basename((o if role == 'OPS' else f)[0])}, scoring "
+                                  f"{', '.join(map(os.path.basename, extra))} unpaired")
+                pairs += [(f"{t} ({os.path.basename(x)})", x if role == "OPS" else None, x if role == "FIN" else None)
+                          for x in extra]
+    return pairs
+
+def score_many(pairs: List[Tuple[str, Optional[str], Optional[str]]], workers: Optional[int] = None,
+               last_weeks: int = 0) -> pd.DataFrame:
+    # one pair per process-pool task; results concatenated in input order
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(pairs) <= 1:
+        parts = [score_pair(t, o, f, last_weeks) for t, o, f in pairs]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(pairs))) as pool:
+            parts = list(pool.map(score_pair, *zip(*pairs), [last_weeks] * len(pairs)))
+    parts = [p for p in parts if not p.empty]
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=RESULT_COLS)
+
+def write_results(df: pd.DataFrame, out: str) -> str:
+    # Parquet by extension (CSV when pyarrow is missing), CSV otherwise
+    if out.endswith(".parquet"):
+        try:
+            df.to_parquet(out, index=False)
+            return out
+        except ImportError:
+            out = out[:-len(".parquet")] + ".csv"
+    df.to_csv(out, index=False)
+    return out
+
+if __name__ == "__main__":
+    # python kpi_engine.py <dir> [-o scores.parquet] [--workers N] [--last-weeks 12]
+    import argparse
+    ap = argparse.ArgumentParser(description="Score OPS/FIN workbook pairs without the UI")
+    ap.add_argument("root", help="folder of team folders, or of <team>_ops/<team>_fin workbooks")
+    ap.add_argument("-o", "--out", default="kpi_scores.parquet")
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--last-weeks", type=int, default=0, help="limit to the last N weeks (pages default to 12)")
+    args = ap.parse_args()
+    pairs = discover_pairs(args.root)
+    t0 = time.perf_counter()
+    res = score_many(pairs, args.workers, args.last_weeks)
+    path = write_results(res, args.out)
+    print(f"{len(pairs)} pairs, {len(res)} rows -> {path} in {time.perf_counter() - t0:.2f}s")
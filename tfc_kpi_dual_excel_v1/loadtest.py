@@ -0,0 +1,177 @@
+
+import os, sys, json, time, random, resource, statistics
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from typing import Dict, List, Optional, Tuple
+from unittest.mock import MagicMock, patch
+from streamlit.runtime import Runtime
+from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+from streamlit.runtime.dataframe_source_manager import DataframeSourceManager
+from streamlit.runtime.media_file_manager import MediaFileManager
+from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+from streamlit.testing.v1 import AppTest
+from streamlit.testing.v1 import app_test
+from streamlit.testing.v1.util import patch_config_options
+from kpi_engine import discover_pairs
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+SAMPLE_DIR = os.path.dirname(APP_DIR)  # the bundled sample workbooks sit next to the app folder
+
+# page -> interaction script: (widget kind, label) steps replayed in order, each followed by a rerun;
+# Round/Week are add_time_filters' multiselects (one pair per source), the rest are the page filters/selectors
+SCRIPTS: Dict[str, List[Tuple[str, str]]] = {
+    "streamlit_app.py": [],
+    "pages/1_Purchase.py": [("multiselect", "Round"), ("multiselect", "Week"), ("multiselect", "Supplier(s)")],
+    "pages/2_Sales.py": [("multiselect", "Round"), ("multiselect", "Week"), ("multiselect", "Customer(s)"),
+                         ("multiselect", "Product(s)")],
+    "pages/3_SCM.py": [("multiselect", "Round"), ("multiselect", "Week"), ("multiselect", "Product(s)"),
+                       ("multiselect", "Component(s)")],
+    "pages/4_Operations.py": [("multiselect", "Round"), ("multiselect", "Week")],
+    "pages/5_Finance.py": [("multiselect", "Round"), ("multiselect", "Week"), ("selectbox", "Break down by"),
+                           ("selectbox", "Metric")],
+}
+
+def _rss_mb() -> Tuple[float, float]:
+    # (current, peak) resident set size of this process
+    try:
+        with open("/proc/self/status") as f:
+            kv = dict(line.split(":", 1) for line in f if ":" in line)
+        return int(kv["VmRSS"].split()[0]) / 1024, int(kv["VmHWM"].split()[0]) / 1024
+    except (OSError, KeyError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 if sys.platform != "darwin" else 2**20)
+        return peak, peak
+
+def _reset_peak() -> None:
+    # restart VmHWM so the next peak covers one level only (Linux); elsewhere the peak is since start
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+class _RuntimeSlot:
+    # stands in for Runtime inside AppTest: its per-run `Runtime._instance = ...` set/clear is swallowed
+    def __setattr__(self, name, value):
+        pass
+
+@contextmanager
+def shared_runtime():
+    # AppTest.run installs a fresh mock Runtime and patches config.get_option around every run, then tears
+    # both down, so concurrent runs would pull them from under each other. Here the process gets one runtime
+    # (one media/cache manager, as a server has) and one config patch for all sessions
+    rt = MagicMock(spec=Runtime)
+    rt.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    rt.dataframe_source_mgr = DataframeSourceManager()
+    rt.cache_storage_manager = MemoryCacheStorageManager()
+    with patch_config_options({"global.appTest": True}), patch.object(app_test, "Runtime", _RuntimeSlot()), \
+            patch.object(app_test, "patch_config_options", lambda overrides: nullcontext()):
+        Runtime._instance = rt
+        try:
+            yield
+        finally:
+            Runtime._instance = None
+
+def _pick(at: AppTest, kind: str, label: str, rng: random.Random) -> bool:
+    # changes one widget with this label the way a user would; False when the page has none
+    widgets = [w for w in (at.multiselect if kind == "multiselect" else at.selectbox) if w.label == label]
+    if not widgets:
+        return False
+    w = rng.choice(widgets)
+    opts = list(w.options)
+    if not opts:
+        return False
+    if kind == "selectbox":
+        w.select(rng.choice(opts))
+        return True
+    cast = type(w.value[0]) if w.value else str  # options come back as labels; values keep their type
+    w.set_value([cast(o) for o in rng.sample(opts, rng.randint(1, len(opts)))])
+    return True
+
+def session(page: str, ops: Optional[str], fin: Optional[str], steps: int, seed: int) -> List[dict]:
+    # one simulated user: open the page, then replay its script for `steps` interactions
+    rng = random.Random(seed)
+    at = AppTest.from_file(os.path.join(APP_DIR, page), default_timeout=300)
+    at.session_state["ops_path"], at.session_state["fin_path"] = ops, fin
+    script, out = SCRIPTS[page], []
+    for i in range(steps + 1):
+        kind = "open"
+        if i:
+            kind, label = script[(i - 1) % len(script)] if script else ("rerun", "")
+            if script and not _pick(at, kind, label, rng):
+                kind = "rerun"
+        t0 = time.perf_counter()
+        at.run()
+        out.append({"page": page, "step": kind, "ms": (time.perf_counter() - t0) * 1000, "errors": len(at.exception),
+                    "error": at.exception[0].value[:300] if at.exception else None})
+    return out
+
+def _pct(xs: List[float], q: float) -> float:
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(round(q * (len(xs) - 1))))] if xs else float("nan")
+
+def summarize(records: List[dict], wall: float) -> dict:
+    reruns = [r["ms"] for r in records if r["step"] != "open"]
+    by_page = {}
+    for page in sorted({r["page"] for r in records}):
+        ms = [r["ms"] for r in records if r["page"] == page and r["step"] != "open"]
+        opens = [r["ms"] for r in records if r["page"] == page and r["step"] == "open"]
+        by_page[page] = {"reruns": len(ms), "p50_ms": _pct(ms, .5), "p95_ms": _pct(ms, .95),
+                         "open_p50_ms": _pct(opens, .5)}
+    return {"runs": len(records), "reruns": len(reruns), "errors": sum(r["errors"] for r in records),
+            "error_samples": sorted({f"{r['page']}: {r['error']}" for r in records if r["error"]})[:10],
+            "p50_ms": _pct(reruns, .5), "p95_ms": _pct(reruns, .95),
+            "mean_ms": statistics.fmean(reruns) if reruns else float("nan"),
+            "runs_per_s": len(records) / wall if wall else None, "wall_s": wall, "pages": by_page}
+
+def run(levels: List[int], ops: Optional[str], fin: Optional[str], pages: List[str], steps: int = 8,
+        seed: int = 0, warmup: bool = True) -> dict:
+    # N concurrent sessions per level, pages round-robin. Each session is a thread of this one process, like
+    # the script threads of one `streamlit run` server: they share the cache_resource dataset and the GIL,
+    # and the RSS reported is this process's
+    out = {"ops": ops, "fin": fin, "steps": steps, "levels": []}
+    with shared_runtime():
+        if warmup:
+            for page in pages:  # load the shared dataset once so levels measure reruns, not the first parse
+                session(page, ops, fin, 0, seed)
+        for n in levels:
+            base = _rss_mb()[0]
+            _reset_peak()
+            t0 = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=n, thread_name_prefix="session") as ex:
+                futs = [ex.submit(session, pages[i % len(pages)], ops, fin, steps, seed + i) for i in range(n)]
+                records = [r for f in futs for r in f.result()]
+            wall = time.perf_counter() - t0
+            rss, peak = _rss_mb()
+            s = summarize(records, wall)
+            s.update(sessions=n, rss_before_mb=base, rss_mb=rss, rss_peak_mb=peak,
+                     rss_per_session_mb=(peak - base) / n)
+            out["levels"].append(s)
+            print(f"{n:>4} sessions  p50 {s['p50_ms']:8.1f} ms  p95 {s['p95_ms']:8.1f} ms  {s['runs_per_s']:6.2f} runs/s  "
+                  f"RSS peak {peak:7.1f} MB (+{s['rss_per_session_mb']:.1f}/session)  errors {s['errors']}",
+                  file=sys.stderr)
+    return out
+
+def default_sources() -> Tuple[Optional[str], Optional[str]]:
+    # the bundled sample OPS/FIN pair
+    pairs = [p for p in discover_pairs(SAMPLE_DIR) if p[1] and p[2]]
+    return (pairs[0][1], pairs[0][2]) if pairs else (None, None)
+
+if __name__ == "__main__":
+    # python loadtest.py [--sessions 1,4,16] [--steps 8] [--pages pages/2_Sales.py,...] [-o loadtest.json]
+    import argparse
+    ap = argparse.ArgumentParser(description="Replay page interactions across concurrent AppTest sessions")
+    ap.add_argument("--sessions", default="1,4,8", help="comma-separated concurrency levels")
+    ap.add_argument("--steps", type=int, default=8, help="interactions per session after opening the page")
+    ap.add_argument("--pages", default=",".join(SCRIPTS))
+    ap.add_argument("--ops")
+    ap.add_argument("--fin")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--no-warmup", action="store_true")
+    ap.add_argument("-o", "--out", default="loadtest.json")
+    args = ap.parse_args()
+    ops, fin = (args.ops, args.fin) if args.ops or args.fin else default_sources()
+    res = run([int(n) for n in args.sessions.split(",") if n], ops, fin, [p for p in args.pages.split(",") if p],
+              args.steps, args.seed, not args.no_warmup)
+    with open(args.out, "w") as f:
+        json.dump(res, f, indent=1)
+    print(f"wrote {args.out}", file=sys.stderr)
@@ -1,14 +1,18 @@
 
 import streamlit as st, pandas as pd, plotly.express as px
-from utils_dual_v2 import load_sources, coerce_num, add_time_filters
+from utils_dual_v2 import load_sources, time_filter_selection, kpi_tiles, perf_page, perf_panel
+import perf, render
 
 st.set_page_config(page_title="Purchase", page_icon="🛒", layout="wide")
 st.title("🛒 Purchase — Supplier KPIs & Financial Impact")
+perf_page("Purchase")
 
 data = load_sources(st.session_state.get("ops_path"), st.session_state.get("fin_path"),
                     st.session_state.get("ops_up"), st.session_state.get("fin_up"))
-ops = pd.concat(list(data["OPS"].values()), ignore_index=True, sort=False) if data["OPS"] else pd.DataFrame()
-fin = pd.concat(list(data["FIN"].values()), ignore_index=True, sort=False) if data["FIN"] else pd.DataFrame()
+ops = data["facts"]["OPS"]
+fin = data["facts"]["FIN"]
+oix, fix = data["index"]["OPS"], data["index"]["FIN"]
+ok, fk = data["kpis"]["OPS"], data["kpis"]["FIN"]
 
 st.caption(f"Data status → OPS rows: {len(ops)} | FIN rows: {len(fin)}")
 
@@ -16,61 +20,56 @@ if ops.empty and fin.empty:
     st.warning("No supplier data detected. Ensure the OPS and FIN files are selected/uploaded on Home.")
     st.stop()
 
-if not ops.empty: ops = add_time_filters(ops)
-if not fin.empty: fin = add_time_filters(fin)
+perf.stage("filters", rows=len(ops)+len(fin))
+osel = time_filter_selection(ops, oix, key="ops") if not ops.empty else {}
+fsel = time_filter_selection(fin, fix, key="fin") if not fin.empty else {}
+orows, frows = oix.rows(osel), fix.rows(fsel)
 
 # Filters
-sup_list = sorted(pd.concat([ops.get('supplier', pd.Series(dtype=str)),
-                             fin.get('supplier', pd.Series(dtype=str))], ignore_index=True).dropna().unique().tolist())
+sup_list = sorted(set(oix.options("supplier", orows)) | set(fix.options("supplier", frows)))
 sel_sup = st.multiselect("Supplier(s)", sup_list, default=sup_list)
 
-def filt(df):
-    if df.empty or "supplier" not in df.columns: return df
-    return df[df["supplier"].isin(sel_sup)] if sel_sup else df
-
-ops, fin = filt(ops), filt(fin)
+ops = oix.take(ops, oix.rows({"supplier": sel_sup}, orows))
+fin = fix.take(fin, fix.rows({"supplier": sel_sup}, frows))
+osel["supplier"] = fsel["supplier"] = sel_sup
 
+perf.stage("tiles", rows=len(ops)+len(fin))
 # KPI tiles
-ops = coerce_num(ops, ["delivery_reliability_pct","rejection_pct","component_obsolete_pct","raw_material_cost_pct"])
-fin = coerce_num(fin, ["revenue","cogs","indirect_cost","operating_profit","roi_pct"])
-
-c1,c2,c3,c4,c5,c6 = st.columns(6)
-if "delivery_reliability_pct" in ops.columns: c1.metric("Delivery Reliability %", f"{ops['delivery_reliability_pct'].mean():.2f}%")
-if "rejection_pct" in ops.columns: c2.metric("Rejection %", f"{ops['rejection_pct'].mean():.2f}%")
-if "component_obsolete_pct" in ops.columns: c3.metric("Component Obsolete %", f"{ops['component_obsolete_pct'].mean():.2f}%")
-if "raw_material_cost_pct" in ops.columns: c4.metric("RM Cost %", f"{ops['raw_material_cost_pct'].mean():.2f}%")
-if "operating_profit" in fin.columns: c5.metric("Operating Profit", f"{fin['operating_profit'].sum():,.0f}")
-if "roi_pct" in fin.columns: c6.metric("ROI %", f"{fin['roi_pct'].mean():.2f}%")
+kpi_tiles("Purchase", data, {"OPS": osel, "FIN": fsel})
 
+perf.stage("charts")
 # Graphs per KPI
 left,right = st.columns(2)
 if "supplier" in ops.columns and "delivery_reliability_pct" in ops.columns:
     with left:
-        fig = px.box(ops, x="supplier", y="delivery_reliability_pct", points="all", title="Delivery Reliability % by Supplier")
-        st.plotly_chart(fig, use_container_width=True)
-if "supplier" in ops.columns and "rejection_pct" in ops.columns:
+        fig = render.box(ops, x="supplier", y="delivery_reliability_pct", title="Delivery Reliability % by Supplier")
+        render.chart(fig)
+if "supplier" in ops.columns and ok.available("rejection_pct"):
     with right:
-        rej = ops.groupby("supplier", dropna=True)["rejection_pct"].mean().reset_index()
+        rej = ok.frame(["rejection_pct"], "supplier", osel)
         fig = px.bar(rej, x="supplier", y="rejection_pct", title="Avg Rejection % by Supplier")
-        st.plotly_chart(fig, use_container_width=True)
+        render.chart(fig)
 
 left,right = st.columns(2)
-if "supplier" in ops.columns and "component_obsolete_pct" in ops.columns:
+if "supplier" in ops.columns and ok.available("component_obsolete_pct"):
     with left:
-        cob = ops.groupby("supplier", dropna=True)["component_obsolete_pct"].mean().reset_index()
+        cob = ok.frame(["component_obsolete_pct"], "supplier", osel)
         fig = px.bar(cob, x="supplier", y="component_obsolete_pct", title="Component Obsolete % by Supplier")
-        st.plotly_chart(fig, use_container_width=True)
-if "supplier" in ops.columns and "raw_material_cost_pct" in ops.columns:
+        render.chart(fig)
+if "supplier" in ops.columns and ok.available("raw_material_cost_pct"):
     with right:
-        rmc = ops.groupby("supplier", dropna=True)["raw_material_cost_pct"].mean().reset_index()
+        rmc = ok.frame(["raw_material_cost_pct"], "supplier", osel)
         fig = px.bar(rmc, x="supplier", y="raw_material_cost_pct", title="RM Cost % by Supplier")
-        st.plotly_chart(fig, use_container_width=True)
+        render.chart(fig)
 
-if "supplier" in fin.columns and "operating_profit" in fin.columns:
-    fig = px.bar(fin.groupby("supplier", dropna=True)["operating_profit"].sum().reset_index(),
+if "supplier" in fin.columns and fk.available("operating_profit"):
+    fig = px.bar(fk.frame(["operating_profit"], "supplier", fsel),
                  x="supplier", y="operating_profit", title="Operating Profit by Supplier")
-    st.plotly_chart(fig, use_container_width=True)
+    render.chart(fig)
 
+perf.stage("drilldown")
 st.subheader("Drilldown")
-if not ops.empty: st.dataframe(ops)
-if not fin.empty: st.dataframe(fin)
+if not ops.empty: render.paged_dataframe(ops, key="purchase_ops_page")
+if not fin.empty: render.paged_dataframe(fin, key="purchase_fin_page")
+
+perf_panel()
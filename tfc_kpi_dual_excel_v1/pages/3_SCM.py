@@ -1,59 +1,58 @@
 
 import streamlit as st, pandas as pd, plotly.express as px
-from utils_dual_v2 import load_sources, coerce_num, add_time_filters
+from utils_dual_v2 import load_sources, time_filter_selection, kpi_tiles, perf_page, perf_panel
+import perf, render
 
 st.set_page_config(page_title="SCM", page_icon="🔗", layout="wide")
 st.title("🔗 SCM — Availability KPIs & Revenue/ROI Impact")
+perf_page("SCM")
 
 data = load_sources(st.session_state.get('ops_path'), st.session_state.get('fin_path'),
                     st.session_state.get('ops_up'), st.session_state.get('fin_up'))
-scmA = pd.concat([df for df in data["OPS"].values()], ignore_index=True, sort=False) if data["OPS"] else pd.DataFrame()
-finB = pd.concat([df for df in data["FIN"].values()], ignore_index=True, sort=False) if data["FIN"] else pd.DataFrame()
-
-if not scmA.empty: scmA = add_time_filters(scmA)
-if not finB.empty: finB = add_time_filters(finB)
-
-scmA = coerce_num(scmA, ["product_availability_pct","component_availability_pct"])
-finB = coerce_num(finB, ["revenue","roi_pct"])
-
-products = sorted(scmA.get("product", pd.Series(dtype=str)).dropna().unique().tolist())
-components = sorted(scmA.get("component", pd.Series(dtype=str)).dropna().unique().tolist())
+scmA = data["facts"]["OPS"]
+finB = data["facts"]["FIN"]
+six, fix = data["index"]["OPS"], data["index"]["FIN"]
+sk = data["kpis"]["OPS"]
+joins = data["joins"]
+
+perf.stage("filters", rows=len(scmA)+len(finB))
+ssel = time_filter_selection(scmA, six, key="scm") if not scmA.empty else {}
+fsel = time_filter_selection(finB, fix, key="fin") if not finB.empty else {}
+srows, frows = six.rows(ssel), fix.rows(fsel)
+
+products = sorted(six.options("product", srows))
+components = sorted(six.options("component", srows))
 sel_p = st.multiselect("Product(s)", products, default=products)
 sel_c = st.multiselect("Component(s)", components, default=components)
 
-def filt(df):
-    if df.empty: return df
-    m = pd.Series(True, index=df.index)
-    if "product" in df.columns and sel_p: m &= df["product"].isin(sel_p)
-    if "component" in df.columns and sel_c: m &= df["component"].isin(sel_c)
-    return df[m]
+scmA = six.take(scmA, six.rows({"product": sel_p, "component": sel_c}, srows))
+finB = fix.take(finB, fix.rows({"product": sel_p, "component": sel_c}, frows))
+for sel in (ssel, fsel): sel.update(product=sel_p, component=sel_c)
 
-scmA, finB = filt(scmA), filt(finB)
+perf.stage("tiles", rows=len(scmA)+len(finB))
+kpi_tiles("SCM", data, {"OPS": ssel, "FIN": fsel})
 
-c1,c2,c3 = st.columns(3)
-if "product_availability_pct" in scmA.columns: c1.metric("Product Availability %", f"{scmA['product_availability_pct'].mean():.2f}%")
-if "component_availability_pct" in scmA.columns: c2.metric("Component Availability %", f"{scmA['component_availability_pct'].mean():.2f}%")
-if "revenue" in finB.columns: c3.metric("Revenue", f"{finB['revenue'].sum():,.0f}")
-
-if "product" in scmA.columns and "product_availability_pct" in scmA.columns:
-    heat = scmA.groupby(["week","product"])["product_availability_pct"].mean().reset_index()
+perf.stage("charts")
+if "product" in scmA.columns and sk.available("product_availability_pct"):
+    heat = sk.frame(["product_availability_pct"], ["week","product"], ssel)
     if not heat.empty:
         fig = px.density_heatmap(heat, x="week", y="product", z="product_availability_pct", title="Product Availability Heatmap")
-        st.plotly_chart(fig, use_container_width=True)
+        render.chart(fig)
 
-if "component" in scmA.columns and "component_availability_pct" in scmA.columns:
-    comp = scmA.groupby("component")["component_availability_pct"].mean().reset_index().sort_values("component_availability_pct")
+if "component" in scmA.columns and sk.available("component_availability_pct"):
+    comp = sk.frame(["component_availability_pct"], "component", ssel).sort_values("component_availability_pct")
     fig = px.bar(comp, x="component", y="component_availability_pct", title="Lowest Availability Components")
-    st.plotly_chart(fig, use_container_width=True)
+    render.chart(fig)
 
-if "product_availability_pct" in scmA.columns and "revenue" in finB.columns:
-    a = scmA.groupby("product")["product_availability_pct"].mean()
-    b = finB.groupby("product")["revenue"].sum()
-    ab = pd.concat([a,b], axis=1).dropna().reset_index()
+if "product_availability_pct" in scmA.columns and "revenue" in finB.columns and "product" in joins:
+    ab = joins["product"].pair("product_availability_pct", "revenue", osel=ssel, fsel=fsel)
     if not ab.empty:
-        fig = px.scatter(ab, x="product_availability_pct", y="revenue", hover_name="product", title="Availability vs Revenue (Product)")
-        st.plotly_chart(fig, use_container_width=True)
+        fig = render.scatter(ab, x="product_availability_pct", y="revenue", hover_name="product", title="Availability vs Revenue (Product)")
+        render.chart(fig)
 
+perf.stage("drilldown")
 st.subheader("Drilldown")
-if not scmA.empty: st.dataframe(scmA)
-if not finB.empty: st.dataframe(finB)
+if not scmA.empty: render.paged_dataframe(scmA, key="scm_ops_page")
+if not finB.empty: render.paged_dataframe(finB, key="scm_fin_page")
+
+perf_panel()
@@ -0,0 +1,91 @@
+
+import os, json, time, logging, threading
+from collections import Counter, deque
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+LOG_PATH = os.environ.get("TFC_PERF_LOG")  # JSON lines, one record per page run, for a local collector
+DEBUG = os.environ.get("TFC_DEBUG", "0") != "0"  # open the sidebar panel by default
+log = logging.getLogger("tfc.perf")
+
+TOTALS: Counter = Counter()           # process-wide counters since start
+RECENT: deque = deque(maxlen=50)      # last finished runs, newest last
+_lock = threading.Lock()
+_local = threading.local()            # one run per Streamlit script thread
+
+def _new_run(page: str) -> dict:
+    return {"page": page, "ts": time.time(), "t0": time.perf_counter(), "spans": [], "counters": Counter(), "depth": 0}
+
+def current() -> dict:
+    run = getattr(_local, "run", None)
+    if run is None:
+        run = _local.run = _new_run("")
+    return run
+
+def begin_run(page: str) -> dict:
+    _local.run = _new_run(page)
+    return _local.run
+
+@contextmanager
+def span(name: str, rows: Optional[int] = None, bytes: Optional[int] = None, **attrs):
+    # times the block; the yielded dict can be filled with rows/bytes/extra attributes inside it
+    run = current()
+    rec = {"name": name, "depth": run["depth"], "rows": rows, "bytes": bytes, **attrs}
+    run["depth"] += 1
+    t0 = time.perf_counter()
+    try:
+        yield rec
+    finally:
+        rec["ms"] = (time.perf_counter() - t0) * 1000
+        rec["start_ms"] = (t0 - run["t0"]) * 1000
+        run["depth"] -= 1
+        run["spans"].append(rec)
+
+def stage(name: str, rows: Optional[int] = None, **attrs) -> None:
+    # sequential top-level section of a page run: closes the previous stage and opens this one
+    run = current()
+    _close_stage(run)
+    run["stage"] = {"name": name, "depth": run["depth"], "rows": rows, "bytes": None, **attrs,
+                    "_t0": time.perf_counter()}
+    run["depth"] += 1
+
+def _close_stage(run: dict) -> None:
+    rec = run.pop("stage", None)
+    if rec is None:
+        return
+    t0 = rec.pop("_t0")
+    rec["ms"] = (time.perf_counter() - t0) * 1000
+    rec["start_ms"] = (t0 - run["t0"]) * 1000
+    run["depth"] -= 1
+    run["spans"].append(rec)
+
+def count(name: str, n: int = 1) -> None:
+    current()["counters"][name] += n
+    with _lock:
+        TOTALS[name] += n
+
+def end_run() -> dict:
+    # closes the current run: kept in RECENT and written to the structured log
+    run = current()
+    _close_stage(run)
+    record = {"ts": run["ts"], "page": run["page"], "total_ms": (time.perf_counter() - run["t0"]) * 1000,
+              "spans": sorted(run["spans"], key=lambda s: s["start_ms"]), "counters": dict(run["counters"])}
+    with _lock:
+        RECENT.append(record)
+        if LOG_PATH:
+            with open(LOG_PATH, "a") as f:
+                f.write(json.dumps(record, default=str) + "\n")
+    log.debug("%s", json.dumps(record, default=str))
+    _local.run = None
+    return record
+
+def hot_spans(records: List[dict], top: int = 10) -> List[Dict[str, float]]:
+    # spans aggregated by name over runs, slowest total first
+    agg: Dict[str, Dict[str, float]] = {}
+    for r in records:
+        for s in r["spans"]:
+            a = agg.setdefault(s["name"], {"name": s["name"], "calls": 0, "total_ms": 0.0, "max_ms": 0.0})
+            a["calls"] += 1
+            a["total_ms"] += s["ms"]
+            a["max_ms"] = max(a["max_ms"], s["ms"])
+    return sorted(agg.values(), key=lambda a: -a["total_ms"])[:top]
@@ -0,0 +1,112 @@
+
+import os
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import streamlit as st
+import perf, trends
+from typing import Optional
+
+POINT_BUDGET = int(os.environ.get("TFC_POINT_BUDGET", "5000"))  # max raw points per chart sent to the browser
+PAGE_ROWS = int(os.environ.get("TFC_PAGE_ROWS", "1000"))        # drilldown rows per page
+
+def _budget(budget: Optional[int]) -> int:
+    return POINT_BUDGET if budget is None else budget
+
+def box(df: pd.DataFrame, x: str, y: str, title: str, budget: Optional[int] = None) -> go.Figure:
+    # px.box(points="all") while it fits the budget; beyond that, quartiles/fences are computed
+    # here and only a sample of the outliers travels with the figure
+    budget = _budget(budget)
+    if len(df) <= budget:
+        return px.box(df, x=x, y=y, points="all", title=title)
+    d = df[[x, y]].dropna()
+    stats, outliers = [], []
+    for cat, vals in d.groupby(x, observed=True, sort=False)[y]:
+        v = vals.to_numpy(dtype="float64")
+        q1, med, q3 = np.quantile(v, [0.25, 0.5, 0.75])
+        lo, hi = q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)
+        inside = v[(v >= lo) & (v <= hi)]
+        stats.append((cat, q1, med, q3, inside.min(), inside.max()))
+        out = v[(v < lo) | (v > hi)]
+        outliers.append(pd.DataFrame({x: cat, y: out}))
+    fig = go.Figure()
+    if stats:
+        cats, q1, med, q3, lf, uf = map(list, zip(*stats))
+        fig.add_trace(go.Box(x=cats, q1=q1, median=med, q3=q3, lowerfence=lf, upperfence=uf,
+                             name=y, boxpoints=False, showlegend=False))
+    out = pd.concat(outliers, ignore_index=True) if outliers else pd.DataFrame(columns=[x, y])
+    if len(out) > budget:
+        out = out.sample(budget, random_state=0).sort_index()  # stable across reruns
+    if len(out):
+        fig.add_trace(go.Scatter(x=out[x], y=out[y], mode="markers", name="outliers", showlegend=False,
+                                 marker=dict(size=4, opacity=0.6)))
+    n_out = sum(len(o) for o in outliers)
+    note = f" (summarized from {len(d):,} rows; {len(out):,} of {n_out:,} outliers shown)"
+    fig.update_layout(title=title + note, xaxis_title=x, yaxis_title=y)
+    return fig
+
+def lttb(x: np.ndarray, y: np.ndarray, n: int) -> np.ndarray:
+    # Largest-Triangle-Three-Buckets: indices of n points that keep the visual shape of (x, y)
+    size = len(x)
+    if n >= size or n < 3:
+        return np.arange(size)
+    edges = (np.arange(n - 1) * ((size - 2) / (n - 2))).astype(np.intp) + 1  # n-2 buckets inside (0, size-1)
+    edges[-1] = size - 1
+    keep = np.empty(n, dtype=np.intp)
+    keep[0], keep[-1] = 0, size - 1
+    a = 0
+    for i in range(n - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nlo, nhi = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (size - 1, size)
+        cx, cy = x[nlo:nhi].mean(), y[nlo:nhi].mean()  # average of the next bucket
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+def line(df: pd.DataFrame, x: str, y: str, title: str, budget: Optional[int] = None) -> go.Figure:
+    # px.line over x-sorted rows, LTTB-downsampled to the point budget
+    budget = _budget(budget)
+    d = df[[x, y]].sort_values(x)  # only the plotted columns are copied
+    if len(d) > budget:
+        d = d.dropna()
+        xs = pd.to_numeric(d[x], errors="coerce").to_numpy(dtype="float64")
+        if np.isnan(xs).any():
+            xs = np.arange(len(d), dtype="float64")  # non-numeric axis: bucket by position
+        d = d.iloc[lttb(xs, d[y].to_numpy(dtype="float64"), budget)]
+        title = f"{title} ({len(d):,} of {len(df):,} points)"
+    return px.line(d, x=x, y=y, title=title)
+
+def scatter(df: pd.DataFrame, x: str, y: str, title: str, hover_name: Optional[str] = None) -> go.Figure:
+    # px.scatter with an OLS trendline from trends.fits (what trendline="ols" drew, without statsmodels)
+    fig = px.scatter(df, x=x, y=y, hover_name=hover_name, title=title)
+    f = trends.fits(df, x, y).iloc[0]
+    if np.isfinite(f["slope"]):
+        xs = np.sort(df[x].to_numpy(dtype="float64")[np.isfinite(df[[x, y]].to_numpy(dtype="float64")).all(axis=1)])
+        fig.add_scatter(x=xs, y=f["slope"] * xs + f["intercept"], mode="lines", showlegend=False,
+                        marker_color=fig.data[0].marker.color,
+                        hovertemplate=f"<b>OLS trendline</b><br>{y} = {f['slope']:g} * {x} + {f['intercept']:g}"
+                                      f"<br>R<sup>2</sup>={f['r2']:f}<br><br>{x}=%{{x}}<br>{y}=%{{y}} <b>(trend)</b><extra></extra>")
+    return fig
+
+def chart(fig: go.Figure, name: Optional[str] = None) -> None:
+    # st.plotly_chart with a perf span; payload bytes are measured only while the perf panel is open
+    title = name or (fig.layout.title.text or "chart")
+    with perf.span(f"chart:{title}") as sp:
+        sp["rows"] = sum(len(t.x) if getattr(t, "x", None) is not None else 0 for t in fig.data)
+        if st.session_state.get("perf_panel"):
+            sp["bytes"] = len(fig.to_json())
+        st.plotly_chart(fig, use_container_width=True)
+
+def paged_dataframe(df: pd.DataFrame, key: str, page_rows: Optional[int] = None) -> None:
+    # st.dataframe, one page at a time once the frame outgrows page_rows
+    page_rows = PAGE_ROWS if page_rows is None else page_rows
+    if len(df) <= page_rows:
+        st.dataframe(df)
+        return
+    pages = -(-len(df) // page_rows)
+    page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, step=1, key=key)
+    start = (int(page) - 1) * page_rows
+    st.caption(f"Rows {start + 1:,}–{min(start + page_rows, len(df)):,} of {len(df):,}")
+    st.dataframe(df.iloc[start:start + page_rows])
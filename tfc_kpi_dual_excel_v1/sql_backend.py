@@ -0,0 +1,201 @@
+
+import os, hashlib, threading, weakref
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Sequence, Union
+import disk_cache
+from kpi_cube import ROWS
+
+try:
+    import duckdb
+except ImportError:  # optional: only TFC_BACKEND=duckdb needs it
+    duckdb = None
+
+SQL_DIR = os.path.join(disk_cache.CACHE_DIR, "sql")
+SQL_MAX_MB = float(os.environ.get("TFC_SQL_MAX_MB", str(disk_cache.CACHE_MAX_MB)))
+
+_con = None
+_lock = threading.Lock()
+_live: Dict[str, int] = {}  # Parquet file -> live SqlCubes reading it in this process; evict() leaves these alone
+
+def _cursor():
+    # one in-memory DuckDB per process (data stays in the Parquet files); a cursor per query/thread
+    global _con
+    with _lock:
+        if _con is None:
+            _con = duckdb.connect()
+    return _con.cursor()
+
+def _q(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+def _lit(path: str) -> str:
+    return "'" + path.replace("'", "''") + "'"
+
+def _py(v):
+    return v.item() if isinstance(v, np.generic) else v
+
+def _normalize(frame: pd.DataFrame, dims: Sequence[str], metrics: Sequence[str]) -> pd.DataFrame:
+    # dims keep their type (mixed-type columns become VARCHAR), metrics become DOUBLE
+    out = {}
+    for c in dims:
+        if c in frame.columns:
+            col = frame[c]
+            if col.dtype == object and col.dropna().map(type).nunique() > 1:
+                col = col.map(lambda v: None if pd.isna(v) else str(v))
+            out[c] = col
+    for m in metrics:
+        if m in frame.columns:
+            out[m] = pd.to_numeric(frame[m], errors="coerce").astype("float64")
+    return pd.DataFrame(out)
+
+def sheet_file(frame: pd.DataFrame, dims: Sequence[str], metrics: Sequence[str], tag: str = "") -> str:
+    # one Parquet file per standardized sheet, reused across loads via the sheet fingerprint
+    # (or a hash of the normalized rows for sheets without one, e.g. uploads read from bytes)
+    fp = frame.attrs.get("fingerprint")
+    norm = None
+    if not fp:
+        norm = _normalize(frame, dims, metrics)
+        fp = "rows:" + hashlib.sha1(pd.util.hash_pandas_object(norm, index=False).to_numpy().tobytes()
+                                    + "|".join(f"{c}:{t}" for c, t in norm.dtypes.astype(str).items()).encode()).hexdigest()
+    name = hashlib.sha1(f"{fp}|{tag}|{list(dims)}|{list(metrics)}".encode()).hexdigest()
+    path = os.path.join(SQL_DIR, name + ".parquet")
+    if os.path.exists(path):
+        os.utime(path)  # LRU stamp
+        return path
+    os.makedirs(SQL_DIR, exist_ok=True)
+    tmp = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+    cur = _cursor()
+    cur.register("sheet", _normalize(frame, dims, metrics) if norm is None else norm)
+    try:
+        cur.execute(f"COPY sheet TO {_lit(tmp)} (FORMAT PARQUET)")
+    finally:
+        cur.unregister("sheet")
+    os.replace(tmp, path)
+    return path
+
+def _hold(files: Sequence[str]) -> None:
+    with _lock:
+        for f in files:
+            _live[f] = _live.get(f, 0) + 1
+
+def _release(files: Sequence[str]) -> None:
+    with _lock:
+        for f in files:
+            n = _live.get(f, 0) - 1
+            if n > 0:
+                _live[f] = n
+            else:
+                _live.pop(f, None)
+
+def evict(max_mb: Optional[float] = None, keep: Sequence[str] = ()) -> None:
+    # drops least recently used files beyond the size limit, except keep and files a live SqlCube reads.
+    # Live files are tracked per process; another server process sharing SQL_DIR is only protected by
+    # the LRU order (files are re-stamped whenever a load reuses them)
+    limit = (SQL_MAX_MB if max_mb is None else max_mb) * 1024 * 1024
+    if not os.path.isdir(SQL_DIR):
+        return
+    with _lock:
+        held = set(keep) | set(_live)
+    files = sorted((e.stat().st_mtime, e.stat().st_size, e.path) for e in os.scandir(SQL_DIR) if e.name.endswith(".parquet"))
+    total = sum(size for _, size, _ in files)
+    for _, size, path in files:
+        if total <= limit:
+            break
+        if path in held:
+            continue
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        total -= size
+
+class SqlCube:
+    # KpiCube's query interface (has/total/by/top/partials) answered by DuckDB over per-sheet Parquet files,
+    # so aggregation never needs the rows in pandas memory (the pages' fact tables still do, see ingest.load_data).
+    # Its files are registered as live until the cube is garbage collected
+    def __init__(self, files: Sequence[str], dims: Sequence[str], metrics: Sequence[str]):
+        if duckdb is None:
+            raise ImportError("TFC_BACKEND=duckdb needs the duckdb package")
+        self.files = list(files)
+        _hold(self.files)
+        weakref.finalize(self, _release, tuple(self.files))
+        self.types: Dict[str, str] = {}
+        if self.files:
+            desc = _cursor().execute(f"DESCRIBE SELECT * FROM {self._source()}").fetchall()
+            self.types = {row[0]: row[1] for row in desc}
+        self.keys = [c for c in dims if c in self.types]
+        self.metrics = [m for m in metrics if m in self.types]
+
+    @classmethod
+    def from_sheets(cls, sheets: Dict[str, pd.DataFrame], dims: Sequence[str], metrics: Sequence[str],
+                    tag: str = "") -> "SqlCube":
+        files = [sheet_file(f, dims, metrics, tag) for f in sheets.values() if not f.empty]
+        cube = cls(files, dims, metrics)
+        evict()
+        return cube
+
+    def _source(self) -> str:
+        return f"read_parquet([{', '.join(_lit(f) for f in self.files)}], union_by_name=true)"
+
+    def has(self, metric: str) -> bool:
+        return metric in self.metrics
+
+    def _where(self, sel: Optional[Dict[str, list]], not_null: Sequence[str] = ()):
+        # same semantics as KpiCube.mask: empty selections and unknown columns are ignored
+        conds, params = [f"{_q(d)} IS NOT NULL" for d in not_null], []
+        for c, picked in (sel or {}).items():
+            if c in self.keys and picked:
+                vals = [str(v) if self.types[c] == "VARCHAR" else _py(v) for v in picked]
+                conds.append(f"{_q(c)} IN ({', '.join('?' * len(vals))})")
+                params += vals
+        return (" WHERE " + " AND ".join(conds)) if conds else "", params
+
+    def _agg(self, metric: str, how: str) -> str:
+        if metric == ROWS:
+            return f"COUNT(*) AS {_q(ROWS)}"
+        if how == "sum":
+            return f"COALESCE(SUM({_q(metric)}), 0) AS {_q(metric)}"
+        return f"AVG({_q(metric)}) AS {_q(metric)}"
+
+    def total(self, metric: str, how: str = "mean", sel: Optional[Dict[str, list]] = None) -> float:
+        if not self.files or (metric != ROWS and metric not in self.metrics):
+            return np.nan
+        where, params = self._where(sel)
+        value = _cursor().execute(f"SELECT {self._agg(metric, how)} FROM {self._source()}{where}", params).fetchone()[0]
+        return np.nan if value is None else float(value)
+
+    def by(self, dims: Union[str, List[str]], metrics: Union[str, List[str]], how: str = "mean",
+           sel: Optional[Dict[str, list]] = None, order: Optional[str] = None, limit: Optional[int] = None) -> pd.DataFrame:
+        # GROUP BY dims (NULL keys dropped), ordered by dims unless order is given
+        dims = [dims] if isinstance(dims, str) else list(dims)
+        metrics = [metrics] if isinstance(metrics, str) else list(metrics)
+        if not self.files:
+            return pd.DataFrame(columns=dims + metrics)
+        where, params = self._where(sel, not_null=dims)
+        cols = ", ".join(_q(d) for d in dims)
+        sql = (f"SELECT {cols}, {', '.join(self._agg(m, how) for m in metrics)} FROM {self._source()}{where} "
+               f"GROUP BY {cols} ORDER BY {order or cols}")
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        return _cursor().execute(sql, params).df()
+
+    def partials(self, dims: Sequence[str], metrics: Sequence[str], sel: Optional[Dict[str, list]] = None) -> pd.DataFrame:
+        # KpiCube.partials: m__sum / m__n per group plus the row count, in one scan
+        dims, metrics = list(dims), [m for m in metrics if m in self.metrics]
+        names = [f"{m}__sum" for m in metrics] + [f"{m}__n" for m in metrics] + [ROWS]
+        if not self.files:
+            return pd.DataFrame(columns=dims + names) if dims else pd.DataFrame([dict.fromkeys(names, 0)])
+        aggs = [f"COALESCE(SUM({_q(m)}), 0)" for m in metrics] + [f"COUNT({_q(m)})" for m in metrics] + ["COUNT(*)"]
+        select = ", ".join(f"{a} AS {_q(n)}" for a, n in zip(aggs, names))
+        where, params = self._where(sel, not_null=dims)
+        if not dims:
+            return _cursor().execute(f"SELECT {select} FROM {self._source()}{where}", params).df()
+        cols = ", ".join(_q(d) for d in dims)
+        return _cursor().execute(f"SELECT {cols}, {select} FROM {self._source()}{where} GROUP BY {cols} ORDER BY {cols}",
+                                 params).df()
+
+    def top(self, dim: str, metric: str, how: str = "sum", n: int = 20,
+            sel: Optional[Dict[str, list]] = None) -> pd.DataFrame:
+        # ranking pushed into the engine: ORDER BY ... DESC LIMIT n
+        return self.by(dim, metric, how, sel, order=f"{_q(metric)} DESC NULLS LAST, {_q(dim)}", limit=n)
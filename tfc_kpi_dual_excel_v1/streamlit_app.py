@@ -1,12 +1,15 @@
 
 import streamlit as st
-from utils_dual_v2 import list_candidate_excels, load_sources
+from utils_dual_v2 import list_candidate_excels, load_sources, start_watcher, perf_page, perf_panel
+import upload_store
 
 st.set_page_config(page_title="TFC KPI (Dual Excel v2)", page_icon="🍊", layout="wide")
 st.title("🍊 The Fresh Connection — Dual-Source KPI Dashboards (v2)")
+perf_page("Home")
 st.caption("No consolidation. Reads two Excel workbooks directly. Choose which file is Ops vs Finance or upload them.")
 
-# discover files
+# discover files (the watcher keeps the list current and pre-parses new exports)
+start_watcher()
 cands = list_candidate_excels()
 st.write("Detected Excel files:", cands if cands else "None found. You can still upload below.")
 
@@ -29,14 +32,14 @@ if fin_choice != "<upload or none>":
     st.session_state["fin_path"] = fin_choice
 
 with st.expander("⬆️ Upload workbooks (optional)"):
-    up_ops = st.file_uploader("Upload Operations workbook (.xlsx)", type=["xlsx"], key="ops_up")
-    up_fin = st.file_uploader("Upload Finance workbook (.xlsx)", type=["xlsx"], key="fin_up")
-    # Keep in session for all pages
+    up_ops = st.file_uploader("Upload Operations workbook (.xlsx)", type=["xlsx"], key="ops_upload")
+    up_fin = st.file_uploader("Upload Finance workbook (.xlsx)", type=["xlsx"], key="fin_upload")
+    # Keep in session for all pages: only the spooled (content-addressed) path, not the bytes
     if up_ops is not None:
-        st.session_state["ops_up"] = up_ops
+        st.session_state["ops_up"] = upload_store.spool(up_ops)
         st.success("Operations workbook uploaded and will override selection.")
     if up_fin is not None:
-        st.session_state["fin_up"] = up_fin
+        st.session_state["fin_up"] = upload_store.spool(up_fin)
         st.success("Finance workbook uploaded and will override selection.")
 
 # load summary (for user feedback only)
@@ -52,3 +55,5 @@ st.info(f"Loaded: {msg}. Use the sidebar pages. (Pages degrade gracefully if a s
 with st.expander("Sheets detected"):
     st.write("**OPS sheets:**", list(data["OPS"].keys()))
     st.write("**FIN sheets:**", list(data["FIN"].keys()))
+
+perf_panel()
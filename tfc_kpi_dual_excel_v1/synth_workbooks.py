@@ -0,0 +1,79 @@
+
+import os
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Tuple
+from ingest import ALIAS, std_col
+
+# OPS sheet layouts: (sheet name, dimension keys, KPI keys); sheets cycle through these
+OPS_LAYOUTS = [
+    ("Supplier", ["supplier", "component"],
+     ["delivery_reliability_pct", "rejection_pct", "component_obsolete_pct", "raw_material_cost_pct", "component_availability_pct"]),
+    ("Customer", ["customer", "product"],
+     ["service_level_pct", "shelf_life_days", "forecast_error_pct", "obsolescence_value", "product_availability_pct",
+      "order_qty", "delivered_qty", "backorder_qty"]),
+    ("Operations", ["plant", "warehouse"],
+     ["inbound_cube_util_pct", "outbound_cube_util_pct", "mixing_util_pct", "bottling_util_pct", "plan_adherence_pct"]),
+]
+FIN_LAYOUT = ("Finance", ["customer", "product", "supplier"],
+              ["revenue", "cogs", "indirect_cost", "operating_profit", "roi_pct", "capital_employed"])
+
+def _header(key: str, rng) -> str:
+    # a random ALIAS spelling of key, title-cased like the exports; only spellings that map back to key
+    spellings = [v for v in ALIAS[key] if std_col(v.title()) == key] or [key]
+    return spellings[rng.integers(len(spellings))].title()
+
+def _values(key: str, n: int, rng, members: Dict[str, List[str]]):
+    if key in members:
+        return rng.choice(members[key], n)
+    if key.endswith("_qty"):
+        return rng.integers(0, 5000, n)
+    if key.endswith("_pct") or key == "shelf_life_days":
+        v = rng.uniform(50, 100, n)
+    elif key in ("operating_profit",):
+        v = rng.normal(1e4, 5e3, n)
+    else:
+        v = rng.uniform(1e3, 1e5, n)
+    v[rng.random(n) < 0.05] = np.nan  # sparse gaps, as in real exports
+    return v
+
+def _sheet(dims: List[str], kpis: List[str], rows: int, rounds: int, weeks: int, rng, members) -> pd.DataFrame:
+    cols = {_header("round", rng): rng.integers(1, rounds + 1, rows), _header("week", rng): rng.integers(1, weeks + 1, rows)}
+    for key in dims + kpis:
+        cols[_header(key, rng)] = _values(key, rows, rng, members)
+    return pd.DataFrame(cols)
+
+def make_workbooks(out_dir: str, rows: int = 3000, sheets: int = 3, fin_rows: Optional[int] = None,
+                   rounds: int = 3, weeks: int = 20, customers: int = 4, products: int = 6,
+                   suppliers: int = 5, components: int = 8, plants: int = 2, warehouses: int = 2,
+                   seed: int = 0) -> Tuple[str, str]:
+    # writes <out_dir>/ops.xlsx (sheets x rows) and <out_dir>/fin.xlsx; returns both paths
+    rng = np.random.default_rng(seed)
+    members = {"customer": [f"Cust{i}" for i in range(customers)], "product": [f"Prod{i}" for i in range(products)],
+               "supplier": [f"Sup{i}" for i in range(suppliers)], "component": [f"Comp{i}" for i in range(components)],
+               "plant": [f"Plant{i}" for i in range(plants)], "warehouse": [f"WH{i}" for i in range(warehouses)]}
+    os.makedirs(out_dir, exist_ok=True)
+    ops_path, fin_path = os.path.join(out_dir, "ops.xlsx"), os.path.join(out_dir, "fin.xlsx")
+    with pd.ExcelWriter(ops_path) as w:
+        for i in range(sheets):
+            name, dims, kpis = OPS_LAYOUTS[i % len(OPS_LAYOUTS)]
+            name = name if i < len(OPS_LAYOUTS) else f"{name} {i // len(OPS_LAYOUTS) + 1}"
+            _sheet(dims, kpis, rows, rounds, weeks, rng, members).to_excel(w, sheet_name=name, index=False)
+    name, dims, kpis = FIN_LAYOUT
+    with pd.ExcelWriter(fin_path) as w:
+        _sheet(dims, kpis, fin_rows or rows, rounds, weeks, rng, members).to_excel(w, sheet_name=name, index=False)
+    return ops_path, fin_path
+
+if __name__ == "__main__":
+    # python synth_workbooks.py <out_dir> [--rows N] [--sheets N] ...
+    import argparse
+    ap = argparse.ArgumentParser(description="Write synthetic TFC OPS/FIN workbooks")
+    ap.add_argument("out_dir")
+    for opt, default in [("rows", 3000), ("sheets", 3), ("fin-rows", 0), ("rounds", 3), ("weeks", 20), ("customers", 4),
+                         ("products", 6), ("suppliers", 5), ("components", 8), ("plants", 2), ("warehouses", 2),
+                         ("seed", 0)]:
+        ap.add_argument(f"--{opt}", type=int, default=default)
+    a = ap.parse_args()
+    paths = make_workbooks(a.out_dir, a.rows, a.sheets, a.fin_rows or None, a.rounds, a.weeks, a.customers,
+                           a.products, a.suppliers, a.components, a.plants, a.warehouses, a.seed)
+    print("\n".join(paths))
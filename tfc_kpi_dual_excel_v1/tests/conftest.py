@@ -0,0 +1,31 @@
+
+import os, sys, tempfile
+import pytest
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+# isolated cache dir and no background watcher, set before any app module reads them
+os.environ.setdefault("TFC_CACHE_DIR", tempfile.mkdtemp(prefix="tfc_test_cache_"))
+os.environ.setdefault("TFC_WATCH", "0")
+
+SAMPLE_OPS = os.path.join(os.path.dirname(APP_DIR), "TFC_-2_6.xlsx")
+SAMPLE_FIN = os.path.join(os.path.dirname(APP_DIR), "FinanceReport (3).xlsx")
+
+@pytest.fixture(scope="session")
+def sample():
+    # the bundled sample OPS/FIN workbooks
+    if not (os.path.exists(SAMPLE_OPS) and os.path.exists(SAMPLE_FIN)):
+        pytest.skip("bundled sample workbooks not present")
+    return SAMPLE_OPS, SAMPLE_FIN
+
+@pytest.fixture(scope="session")
+def synth(tmp_path_factory):
+    # small synthetic OPS (3 sheets) / FIN pair using every ALIAS spelling family
+    from synth_workbooks import make_workbooks
+    return make_workbooks(str(tmp_path_factory.mktemp("synth")), rows=400, sheets=3, fin_rows=300, seed=1)
+
+@pytest.fixture(scope="session")
+def loaded(synth):
+    # ingest.load_data over the synthetic pair (sheets, facts, indexes, cubes, joins, KPI engines)
+    import ingest
+    return ingest.load_data(*synth)
@@ -0,0 +1,89 @@
+import pandas as pd
+import pytest
+from column_resolver import ColumnResolver, _n
+from ingest import ALIAS, FALLBACK_RULES, _resolver
+
+# frozen copy of the original if-chain std_col; the compiled resolver must agree with it on every name
+def _reference_std_col(c, alias_rev):
+    n=_n(c)
+    if n in alias_rev: return alias_rev[n]
+    if n.endswith("pct"):
+        if "service" in n or "fill" in n: return "service_level_pct"
+        if "availability" in n and "product" in n: return "product_availability_pct"
+        if "availability" in n and "component" in n: return "component_availability_pct"
+        if "ontime" in n or "reliab" in n: return "delivery_reliability_pct"
+        if "reject" in n: return "rejection_pct"
+        if "obsolete" in n and "component" in n: return "component_obsolete_pct"
+        if "util" in n and "inbound" in n: return "inbound_cube_util_pct"
+        if "util" in n and "outbound" in n: return "outbound_cube_util_pct"
+        if "util" in n and "mix" in n: return "mixing_util_pct"
+        if "util" in n and "bottling" in n: return "bottling_util_pct"
+        if "adherence" in n or "schedule" in n: return "plan_adherence_pct"
+        if "roi" in n: return "roi_pct"
+        if "raw" in n and "cost" in n: return "raw_material_cost_pct"
+    if "order" in n and "qty" in n: return "order_qty"
+    if ("deliver" in n or "ship" in n) and "qty" in n: return "delivered_qty"
+    if "backorder" in n and "qty" in n: return "backorder_qty"
+    if "obsolesc" in n and "qty" in n: return "obsolescence_qty"
+    if "obsolesc" in n and "val" in n: return "obsolescence_value"
+    if "revenue" in n or n=="sales": return "revenue"
+    if "cogs" in n or "costofgoods" in n: return "cogs"
+    if "overhead" in n or "indirect" in n or n=="opex": return "indirect_cost"
+    if "profit" in n or "ebit" in n: return "operating_profit"
+    if n in ["sku","fgsku","fg","item"]: return "product"
+    if "customer" in n or "client" in n or "channel" in n: return "customer"
+    if "supplier" in n or "vendor" in n: return "supplier"
+    if "component" in n or "material" in n or "raw" in n: return "component"
+    if "plant" in n or "factory" in n or "site" in n: return "plant"
+    if "warehouse" in n or n in ["dc","inboundwarehouse","outboundwarehouse"]: return "warehouse"
+    if n.startswith("week") or n=="wk": return "week"
+    if n in ["round","period","cycle"]: return "round"
+    if "date" in n or "timestamp" in n or n=="day": return "date"
+    if "forecast" in n and "error" in n: return "forecast_error_pct"
+    if n=="forecast" or "fcst" in n: return "forecast"
+    if "shelf" in n: return "shelf_life_days"
+    if n=="price" or "unitprice" in n: return "price"
+    if "discount" in n: return "discount"
+    if "capital" in n and "employed" in n: return "capital_employed"
+    if "roi" in n: return "roi_pct"
+    return None
+
+def _corpus(extra=()):
+    # every alias and rule term alone, suffixed with pct/qty/val, and pairwise combined
+    words = {v for vals in ALIAS.values() for v in vals}
+    for _, alternatives in FALLBACK_RULES:
+        for alt in alternatives:
+            words.update(t.strip("=^$") for t in alt.split())
+    words = sorted(w for w in words if w)
+    corpus = list(extra)
+    for w in words:
+        corpus += [w, w.upper(), f" {w} ", f"{w} pct", f"{w}_qty", f"{w} val", f"{w}%", f"{w} (%)"]
+        corpus += [f"{w} {o}" for o in words]
+        corpus += [f"{w} {o} pct" for o in words]
+    return corpus
+
+def _mismatches(names):
+    alias_rev = {_n(v): k for k, vals in ALIAS.items() for v in vals}
+    return [(c, want, got) for c in names
+            for want, got in [(_reference_std_col(c, alias_rev), _resolver.std_col(c))] if want != got]
+
+def test_matches_reference_chain():
+    corpus = _corpus()
+    assert len(corpus) > 50000
+    assert _mismatches(corpus) == []
+
+def test_matches_reference_on_sample_headers(sample):
+    headers = [str(c) for path in sample for df in pd.read_excel(path, sheet_name=None, nrows=0).values()
+               for c in df.columns]
+    assert headers
+    assert _mismatches(headers) == []
+
+def test_rule_labels_and_order():
+    r = ColumnResolver({"revenue": ["Revenue"]}, [("a", ["x y z"]), ("b", ["=xy", "x$"]), ("c", ["^x"])])
+    assert r.resolve("Revenue") == ("Revenue", "revenue", "alias:revenue")
+    assert r.resolve("x-y") == ("x-y", "b", "fallback#1:=xy")     # equal anchor beats the later rules
+    assert r.resolve("x..y!") == ("x..y!", "b", "fallback#1:=xy")
+    assert r.resolve("xyz")[1:] == ("a", "fallback#0:x y z")        # earliest rule wins across buckets
+    assert r.resolve("bx")[1:] == ("b", "fallback#1:x$")
+    assert r.resolve("xz")[1:] == ("c", "fallback#2:^x")
+    assert r.resolve("zzz")[1:] == (None, None)
@@ -0,0 +1,64 @@
+
+import os
+import numpy as np
+import pandas as pd
+import pytest
+import disk_cache, ingest
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(disk_cache, "FRAMES_DIR", str(tmp_path / "frames"))
+    return tmp_path
+
+def test_roundtrip_keeps_frames(cache_dir):
+    frames = {"A": pd.DataFrame({"week": [1, 2], "revenue": [1.5, np.nan], "customer": ["x", "y"]}),
+              "B": pd.DataFrame({"mixed": [1, "a"]})}  # not expressible in Arrow -> pickle
+    disk_cache.put("k", frames)
+    got = disk_cache.get("k")
+    assert list(got) == ["A", "B"]
+    for s in frames:
+        pd.testing.assert_frame_equal(got[s], frames[s])
+
+def test_missing_and_corrupt_entries_are_misses(cache_dir):
+    assert disk_cache.get("nope") is None
+    disk_cache.put("k", {"A": pd.DataFrame({"a": [1]})})
+    d = os.path.join(disk_cache.FRAMES_DIR, "k")
+    for f in os.listdir(d):
+        if f != "manifest.json":
+            open(os.path.join(d, f), "wb").close()
+    assert disk_cache.get("k") is None
+    assert not os.path.exists(d)  # a broken entry is dropped
+
+def test_evict_drops_least_recently_used(cache_dir):
+    big = {"A": pd.DataFrame({"a": np.arange(50_000, dtype="float64")})}
+    disk_cache.put("old", big)
+    os.utime(os.path.join(disk_cache.FRAMES_DIR, "old", "manifest.json"), (1, 1))
+    disk_cache.put("new", big)
+    disk_cache.evict(max_mb=0.5)
+    assert disk_cache.get("old") is None and disk_cache.get("new") is not None
+
+def test_content_hash_tracks_bytes(tmp_path):
+    p = tmp_path / "w.xlsx"
+    p.write_bytes(b"one")
+    h1 = disk_cache.content_hash(str(p))
+    assert h1 == disk_cache.content_hash(b"one")
+    p.write_bytes(b"two!")
+    assert disk_cache.content_hash(str(p)) != h1
+
+def test_cached_load_matches_fresh_parse(synth, cache_dir):
+    fresh = ingest.parse_workbooks(list(synth), workers=1)
+    cold = ingest.parse_workbooks_cached(list(synth))
+    warm = ingest.parse_workbooks_cached(list(synth))
+    for a, b, c in zip(fresh, cold, warm):
+        assert list(a) == list(b) == list(c)
+        for s in a:
+            pd.testing.assert_frame_equal(a[s], b[s], check_dtype=False)
+            pd.testing.assert_frame_equal(a[s], c[s], check_dtype=False)
+
+def test_cold_load_evicts_once(synth, cache_dir, monkeypatch):
+    calls, evict = [], disk_cache.evict
+    monkeypatch.setattr(disk_cache, "evict", lambda *a: calls.append(a) or evict(*a))
+    ingest.parse_workbooks_cached(list(synth))
+    assert len(os.listdir(disk_cache.FRAMES_DIR)) > 2 and len(calls) == 1
+    ingest.parse_workbooks_cached(list(synth))
+    assert len(calls) == 1  # warm: nothing written, nothing to check
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+from filter_index import FilterIndex
+
+@pytest.fixture(scope="module")
+def frame():
+    rng = np.random.default_rng(0)
+    n = 2000
+    df = pd.DataFrame({"round": rng.integers(1, 5, n), "week": rng.integers(1, 9, n).astype(float),
+                       "customer": rng.choice(["A", "B", "C", None], n), "v": rng.normal(size=n)})
+    df.loc[rng.choice(n, 50, replace=False), "week"] = np.nan
+    return df
+
+def _mask(df, sel):
+    m = np.ones(len(df), dtype=bool)
+    for c, picked in sel.items():
+        if picked:
+            m &= df[c].isin(picked).to_numpy()
+    return np.flatnonzero(m)
+
+@pytest.mark.parametrize("sel", [{}, {"round": [2]}, {"round": [1, 3], "week": [2.0, 5.0]},
+                                 {"customer": ["A", "C"], "round": []}, {"customer": ["A", "B", "C"]},
+                                 {"week": [99.0]}, {"round": [4], "customer": ["B"], "week": [1.0, 2.0, 3.0]}])
+def test_rows_match_isin(frame, sel):
+    idx = FilterIndex(frame, ["round", "week", "customer"])
+    assert np.array_equal(idx.rows(sel), _mask(frame, sel))
+
+def test_rows_with_base_and_unknown_column(frame):
+    idx = FilterIndex(frame, ["round", "customer"])
+    base = idx.rows({"round": [1]})
+    assert np.array_equal(idx.rows({"customer": ["A"], "nope": [1]}, base), _mask(frame, {"round": [1], "customer": ["A"]}))
+
+def test_options(frame):
+    idx = FilterIndex(frame, ["round", "customer"])
+    assert idx.options("customer") == ["A", "B", "C"]
+    rows = idx.rows({"round": [2]})
+    assert idx.options("customer", rows) == sorted(frame.iloc[rows]["customer"].dropna().unique())
+    assert idx.options("missing") == []
+
+def test_take_and_freeze(frame):
+    idx = FilterIndex(frame, ["round"]).freeze()
+    full = idx.take(frame, idx.rows({}))
+    assert full is not frame and np.shares_memory(full["v"].to_numpy(), frame["v"].to_numpy())
+    full["extra"] = 1
+    assert "extra" not in frame.columns
+    rows = idx.rows({"round": [3]})
+    pd.testing.assert_frame_equal(idx.take(frame, rows), frame[frame["round"] == 3])
+    with pytest.raises(ValueError):
+        rows[0] = 0
@@ -0,0 +1,110 @@
+
+import pandas as pd
+import pytest
+import ingest, perf
+
+def _same(a, b):
+    assert list(a) == list(b)
+    for s in a:
+        pd.testing.assert_frame_equal(a[s], b[s], check_dtype=False)
+
+@pytest.mark.parametrize("workers", [2, 3])
+def test_parallel_parse_matches_serial(synth, workers):
+    serial = ingest.parse_workbooks(list(synth), workers=1)
+    parallel = ingest.parse_workbooks(list(synth), workers=workers)
+    for a, b in zip(serial, parallel):
+        _same(a, b)
+
+def test_parallel_parse_respects_only(synth):
+    ops, fin = synth
+    first = ingest._sheet_names(ops)[0]
+    out = ingest.parse_workbooks([ops, fin], workers=2, only=[{first}, None])
+    assert list(out[0]) == [first] and out[1]
+
+def test_sheet_groups_cover_every_sheet_once():
+    names = list("abcdefg")
+    for n in range(0, 10):
+        groups = ingest._sheet_groups(names, n)
+        assert 1 <= len(groups) <= max(1, min(n, len(names)))
+        assert sorted(s for g in groups for s in g) == names
+
+def _fact_on_concat(sheets):
+    # build_fact as it typed the concatenated rows before per-sheet typing
+    df = pd.concat(list(sheets.values()), ignore_index=True, sort=False)
+    for c in df.columns:
+        if c in ingest.KPI_COLS:
+            df[c] = pd.to_numeric(df[c], errors="coerce").astype("float64")
+        elif c in ingest.CATEGORY_COLS and df[c].dropna().map(type).nunique() <= 1:
+            df[c] = df[c].astype("category")
+    return df
+
+def test_build_fact_matches_concat_typing(loaded):
+    for n in ("OPS", "FIN"):
+        pd.testing.assert_frame_equal(ingest.build_fact(loaded[n]), _fact_on_concat(loaded[n]))
+
+def test_build_fact_mixed_columns():
+    sheets = {"a": pd.DataFrame({"week": [1, 2], "customer": ["x", "y"], "revenue": ["1", "2"], "__sheet": "a"}),
+              "b": pd.DataFrame({"week": [3.0, None], "product": ["p", 7], "revenue": [3, None], "__sheet": "b"}),
+              "c": pd.DataFrame({"customer": ["z", None], "round": [1, 1], "__sheet": "c"})}
+    got = ingest.build_fact(sheets)
+    pd.testing.assert_frame_equal(got, _fact_on_concat(sheets))
+    assert got["product"].dtype == object and isinstance(got["customer"].dtype, pd.CategoricalDtype)
+
+def test_build_fact_reuses_unchanged_sheets(loaded):
+    sheets = {s: f.copy() for s, f in loaded["OPS"].items()}
+    for s, f in sheets.items():
+        f.attrs["fingerprint"] = f"test-{s}"
+    ingest.build_fact(sheets)
+    first, changed = list(sheets)[0], list(sheets)[-1]
+    before = {s: ingest._FACT_MEMO[f"test-{s}"] for s in sheets}
+    sheets[changed] = sheets[changed].iloc[:10].copy()
+    sheets[changed].attrs["fingerprint"] = f"test-{changed}-v2"
+    got = ingest.build_fact(sheets)
+    assert ingest._FACT_MEMO[f"test-{first}"] is before[first]  # retyped only the changed sheet
+    assert f"test-{changed}-v2" in ingest._FACT_MEMO
+    pd.testing.assert_frame_equal(got, _fact_on_concat(sheets))
+
+def test_fact_memo_stays_under_its_row_cap(loaded, monkeypatch):
+    sheets = {s: f.copy() for s, f in loaded["OPS"].items()}
+    for s, f in sheets.items():
+        f.attrs["fingerprint"] = f"cap-{s}"
+    monkeypatch.setattr(ingest, "_FACT_MEMO", type(ingest._FACT_MEMO)())
+    monkeypatch.setattr(ingest, "FACT_MEMO_ROWS", max(len(f) for f in sheets.values()))
+    ingest.build_fact(sheets)
+    assert 0 < sum(len(e[0]) for e in ingest._FACT_MEMO.values()) <= ingest.FACT_MEMO_ROWS
+    monkeypatch.setattr(ingest, "FACT_MEMO_ROWS", 0)
+    monkeypatch.setattr(ingest, "_FACT_MEMO", type(ingest._FACT_MEMO)())
+    ingest.build_fact(sheets)
+    assert not ingest._FACT_MEMO  # off
+
+def _export(path, sheets):
+    with pd.ExcelWriter(path) as w:
+        for name, df in sheets.items():
+            df.to_excel(w, sheet_name=name, index=False)
+
+def test_resaved_workbook_reparses_only_the_changed_sheet(synth, tmp_path, monkeypatch):
+    raw = pd.read_excel(synth[0], sheet_name=None)
+    path = str(tmp_path / "ops.xlsx")
+    _export(path, raw)
+    first = ingest.parse_workbooks_cached([path])[0]
+    changed = list(raw)[1]
+    raw[changed].iloc[0, -1] = 12345.0
+    _export(path, raw)  # full re-export: shared strings/styles are renumbered, other sheets' content is the same
+    parsed, parse = [], ingest.parse_workbooks
+
+    def spy(srcs, workers=None, only=None):
+        parsed.append(only)
+        return parse(srcs, workers, only=only)
+
+    monkeypatch.setattr(ingest, "parse_workbooks", spy)
+    perf.begin_run("test")
+    again = ingest.parse_workbooks_cached([path])[0]
+    counters = perf.end_run()["counters"]
+    assert parsed == [[{changed}]]
+    assert counters == {"sheet_cache.hit": len(raw) - 1, "sheet_cache.miss": 1}
+    for s in raw:
+        same = again[s].attrs["fingerprint"] == first[s].attrs["fingerprint"]
+        assert same == (s != changed)
+        if same:
+            pd.testing.assert_frame_equal(again[s], first[s])
+    assert 12345.0 in again[changed].to_numpy()
@@ -0,0 +1,55 @@
+import itertools
+import numpy as np
+import pandas as pd
+import pytest
+import kpi_engine
+from joins import JoinIndex, build_joins
+from kpi_cube import ROWS
+
+def _concat_pair(ops, fin, dim, am, bm, ah, bh, osel, fsel):
+    # what the pages did before the join index
+    a = ops.by(dim, am, ah, osel).set_index(dim)[am]
+    b = fin.by(dim, bm, bh, fsel).set_index(dim)[bm]
+    return pd.concat([a, b], axis=1).dropna().rename_axis(dim).reset_index()
+
+def _same(got, ref, dim):
+    got = got.sort_values(dim, key=lambda x: x.astype(str), ignore_index=True)
+    ref = ref.sort_values(dim, key=lambda x: x.astype(str), ignore_index=True)
+    assert list(got[dim].astype(str)) == list(ref[dim].astype(str))
+    assert np.allclose(got.iloc[:, 1:].to_numpy(dtype="float64"), ref.iloc[:, 1:].to_numpy(dtype="float64"))
+
+def test_pair_matches_concat(loaded):
+    ops, fin, joins = loaded["cube"]["OPS"], loaded["cube"]["FIN"], loaded["joins"]
+    assert joins and all(j.indexed == hasattr(ops, "parts") for j in joins.values())  # SqlCube: by() fallback
+    osel = kpi_engine.default_selection(loaded["index"]["OPS"], 4)
+    fsel = kpi_engine.default_selection(loaded["index"]["FIN"], 4)
+    for dim, j in joins.items():
+        for am, bm in itertools.product(ops.metrics[:3] + [ROWS], fin.metrics[:2]):
+            for (ah, bh), (s1, s2) in itertools.product([("mean", "sum"), ("sum", "mean")], [({}, {}), (osel, fsel)]):
+                _same(j.pair(am, bm, ah, bh, s1, s2), _concat_pair(ops, fin, dim, am, bm, ah, bh, s1, s2), dim)
+
+def test_pair_memo_and_unknown_metric(loaded):
+    j = next(iter(loaded["joins"].values()))
+    ops, fin = loaded["cube"]["OPS"], loaded["cube"]["FIN"]
+    first = j.pair(ops.metrics[0], fin.metrics[0])
+    assert j.pair(ops.metrics[0], fin.metrics[0]) is first
+    assert j.pair("nope", fin.metrics[0]).empty
+
+def test_unindexed_cubes_fall_back_to_by(loaded):
+    class ByOnly:  # a cube without .parts, like SqlCube
+        def __init__(self, cube):
+            self.cube, self.keys, self.metrics = cube, cube.keys, cube.metrics
+        def has(self, m):
+            return self.cube.has(m)
+        def by(self, *a, **k):
+            return self.cube.by(*a, **k)
+    ops, fin = loaded["cube"]["OPS"], loaded["cube"]["FIN"]
+    dim = next(iter(loaded["joins"]))
+    j = JoinIndex(dim, ByOnly(ops), ByOnly(fin))
+    assert not j.indexed
+    _same(j.pair(ops.metrics[0], fin.metrics[0]), loaded["joins"][dim].pair(ops.metrics[0], fin.metrics[0]), dim)
+
+def test_build_joins_only_shared_dims(loaded):
+    ops, fin = loaded["cube"]["OPS"], loaded["cube"]["FIN"]
+    assert set(build_joins(ops, fin)) == {d for d in ("round", "week", "customer", "product", "supplier")
+                                          if d in ops.keys and d in fin.keys}
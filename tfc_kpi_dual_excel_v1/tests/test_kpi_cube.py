@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+import ingest
+from kpi_cube import KpiCube, ROWS
+
+def _fact_cube(loaded, n):
+    fact = loaded["facts"][n]
+    return fact, KpiCube(fact, ingest.CUBE_DIMS, ingest.KPI_COLS)
+
+@pytest.mark.parametrize("n", ["OPS", "FIN"])
+def test_total_matches_fact(loaded, n):
+    fact, cube = _fact_cube(loaded, n)
+    assert cube.metrics
+    for m in cube.metrics:
+        assert cube.total(m, "sum") == pytest.approx(fact[m].sum())
+        assert cube.total(m, "mean") == pytest.approx(fact[m].mean())
+    assert cube.total(ROWS) == len(fact)
+    sel = {"round": [fact["round"].dropna().iloc[0]]}
+    m = cube.metrics[0]
+    assert cube.total(m, "mean", sel) == pytest.approx(fact[fact["round"].isin(sel["round"])][m].mean())
+
+@pytest.mark.parametrize("n", ["OPS", "FIN"])
+def test_by_and_top_match_groupby(loaded, n):
+    fact, cube = _fact_cube(loaded, n)
+    for dim in [d for d in ("round", "customer", "product") if d in cube.keys]:
+        for how in ("sum", "mean"):
+            want = getattr(fact.groupby(dim, observed=True)[cube.metrics], how)().reset_index()
+            got = cube.by(dim, cube.metrics, how)
+            pd.testing.assert_frame_equal(got.sort_values(dim, ignore_index=True),
+                                          want.sort_values(dim, ignore_index=True), check_dtype=False,
+                                          check_categorical=False)
+        m = cube.metrics[0]
+        top = cube.top(dim, m, "sum", n=2)
+        want = fact.groupby(dim, observed=True)[m].sum().sort_values(ascending=False).head(2)
+        assert list(top[m]) == pytest.approx(list(want))
+
+def test_partials(loaded):
+    fact, cube = _fact_cube(loaded, "OPS")
+    m = cube.metrics[0]
+    p = cube.partials(["round"], [m, "unknown"]).set_index("round")
+    g = fact.groupby("round", observed=True)
+    assert np.allclose(p[f"{m}__sum"], g[m].sum().reindex(p.index))
+    assert list(p[f"{m}__n"]) == list(g[m].count().reindex(p.index))
+    assert list(p[ROWS]) == list(g.size().reindex(p.index))
+    assert "unknown__sum" not in p.columns
+    assert cube.partials([], [m])[ROWS].iloc[0] == len(fact)
+
+@pytest.mark.parametrize("n", ["OPS", "FIN"])
+def test_from_sheets_equals_fact_cube(loaded, n):
+    fact, cube = _fact_cube(loaded, n)
+    per_sheet = KpiCube.from_sheets(loaded[n], ingest.CUBE_DIMS, ingest.KPI_COLS)
+    assert per_sheet.keys == cube.keys and per_sheet.metrics == cube.metrics
+    for dim in cube.keys:
+        a = per_sheet.by(dim, cube.metrics + [ROWS], "mean").sort_values(dim, ignore_index=True)
+        b = cube.by(dim, cube.metrics + [ROWS], "mean").sort_values(dim, ignore_index=True)
+        pd.testing.assert_frame_equal(a, b, check_dtype=False, check_categorical=False)
+
+def test_empty_cube():
+    cube = KpiCube(pd.DataFrame(), ingest.CUBE_DIMS, ingest.KPI_COLS)
+    assert cube.keys == [] and cube.metrics == [] and cube.total(ROWS) == 0
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+import ingest, kpi_defs
+from kpi_cube import ROWS
+from kpi_defs import KPIS, KpiEngine, _compile, _run
+
+@pytest.mark.parametrize("expr, want", [("a - b - c", 3 - 4 - 5), ("100 * a / b", 100 * 3 / 4),
+                                        ("a + b * c - 2 / b", 3 + 4 * 5 - 2 / 4), ("a", 3)])
+def test_expressions_follow_precedence(expr, want):
+    assert _run(_compile(expr), {"a": 3, "b": 4, "c": 5}) == pytest.approx(want)
+
+@pytest.mark.parametrize("expr", ["a +", "a b", "(a)", "a ** b", "- a", "__import__('os')"])
+def test_bad_expressions_are_rejected(expr):
+    with pytest.raises(ValueError):
+        _compile(expr)
+
+def test_registry_dependencies_resolve():
+    for name, (how, expr, weight) in KPIS.items():
+        if how == "expr":
+            assert set(kpi_defs.deps(name)) <= set(KPIS)
+
+@pytest.mark.parametrize("n", ["OPS", "FIN"])
+def test_engine_matches_cube(loaded, n):
+    cube, eng = loaded["cube"][n], loaded["kpis"][n]
+    sel = {"round": [loaded["facts"][n]["round"].dropna().iloc[0]]}
+    names = [m for m in cube.metrics if m in KPIS]
+    t = eng.total(names + [ROWS], sel)
+    for m in names:
+        assert t[m] == pytest.approx(cube.total(m, KPIS[m][0], sel), nan_ok=True)
+    assert t[ROWS] == cube.total(ROWS, sel=sel)
+    for dim in ("round", cube.keys[-1]):
+        got = eng.frame(names, dim).sort_values(dim, ignore_index=True)
+        for m in names:
+            want = cube.by(dim, m, KPIS[m][0]).sort_values(dim, ignore_index=True)
+            assert np.allclose(got[m], want[m], equal_nan=True)
+    m = names[0]
+    assert list(eng.top(m, "round", 2)[m]) == pytest.approx(list(cube.top("round", m, KPIS[m][0], 2)[m]))
+
+def test_derived_and_weighted(loaded):
+    fact, eng = loaded["facts"]["FIN"], loaded["kpis"]["FIN"]
+    t = eng.total(["gross_margin_pct", "operating_profit_calc", "roi_weighted_pct", "roi_calc_pct"])
+    rev, cogs, ind = fact["revenue"].sum(), fact["cogs"].sum(), fact["indirect_cost"].sum()
+    assert t["gross_margin_pct"] == pytest.approx(100 * (rev - cogs) / rev)
+    assert t["operating_profit_calc"] == pytest.approx(rev - cogs - ind)
+    ok = fact[["roi_pct", "capital_employed"]].dropna()
+    assert t["roi_weighted_pct"] == pytest.approx((ok["roi_pct"] * ok["capital_employed"]).sum() / ok["capital_employed"].sum())
+    assert t["roi_calc_pct"] == pytest.approx(100 * fact["operating_profit"].sum() / fact["capital_employed"].sum())
+
+def test_missing_indirect_counts_as_zero(loaded):
+    sheets = {s: f.drop(columns=["indirect_cost", "operating_profit", "roi_pct"]) for s, f in loaded["FIN"].items()}
+    for f in sheets.values():
+        f.attrs.pop("fingerprint", None)  # new content: must not hit the full sheets' cached aggregates
+    fact, eng = ingest.build_fact(sheets), KpiEngine(ingest.build_cube(sheets))
+    assert eng.available("indirect_cost") and eng.available("operating_profit") and eng.available("roi_pct")
+    assert not eng.available("service_level_pct")
+    t = eng.total(["indirect_cost", "operating_profit", "roi_pct", "service_level_pct"])
+    profit = fact["revenue"].sum() - fact["cogs"].sum()
+    assert t["indirect_cost"] == 0 and t["operating_profit"] == pytest.approx(profit)
+    assert t["roi_pct"] == pytest.approx(100 * profit / fact["capital_employed"].sum())
+    assert np.isnan(t["service_level_pct"])
+    by = eng.frame(["operating_profit"], "round").set_index("round")["operating_profit"]
+    want = fact.groupby("round", observed=True).apply(lambda g: g["revenue"].sum() - g["cogs"].sum(), include_groups=False)
+    assert np.allclose(by, want.reindex(by.index))
@@ -0,0 +1,34 @@
+import os
+import pytest
+from kpi_engine import discover_pairs
+
+def _touch(d, *names):
+    os.makedirs(d, exist_ok=True)
+    for n in names:
+        open(os.path.join(d, n), "wb").close()
+    return [os.path.join(d, n) for n in names]
+
+def test_folder_pair_and_role_tokens_on_boundaries(tmp_path):
+    ops, fin = _touch(str(tmp_path / "teamX"), "final_results.xlsx", "Finance Report.xlsx")
+    a_ops, a_fin, r_ops, r_fin = _touch(str(tmp_path / "mixed"), "teamA_ops.xlsx", "teamA-fin.xlsx",
+                                        "refined_ops.xlsx", "refined.finance.xlsx")
+    pairs = discover_pairs(str(tmp_path))
+    assert ("teamX", ops, fin) in pairs               # "final" is not a FIN token
+    assert ("teamA", a_ops, a_fin) in pairs
+    assert ("refined", r_ops, r_fin) in pairs         # "refined" keeps its "fin"
+
+def test_duplicate_roles_are_reported(tmp_path):
+    o1, o2, f1 = _touch(str(tmp_path), "teamA_ops.xlsx", "teamA.ops.xlsx", "teamA_fin.xlsx")
+    with pytest.warns(UserWarning, match="teamA.*2 OPS workbooks"):
+        pairs = discover_pairs(str(tmp_path))
+    assert ("teamA", o2, f1) in pairs
+    assert ("teamA (teamA_ops.xlsx)", o1, None) in pairs
+    assert len(pairs) == 2
+
+def test_role_token_in_the_middle_keeps_a_separator(tmp_path):
+    a_ops, a_fin, q_ops, q_fin = _touch(str(tmp_path), "teamA_ops_round3.xlsx", "teamA-fin-round3.xlsx",
+                                        "q1-operations-2024.xlsx", "q1 FinanceReport 2024.xlsx")
+    pairs = discover_pairs(str(tmp_path))
+    assert ("teamA_round3", a_ops, a_fin) in pairs
+    assert ("q1_2024", q_ops, q_fin) in pairs
+    assert len(pairs) == 2
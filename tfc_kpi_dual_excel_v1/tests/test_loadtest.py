@@ -0,0 +1,25 @@
+import threading
+from streamlit import config
+from streamlit.runtime import Runtime
+import loadtest
+
+def test_sessions_run_as_threads_of_one_process(synth):
+    get_option = config.get_option
+    seen = set()
+    session = loadtest.session
+
+    def spy(*a, **k):
+        seen.add(threading.current_thread().name)
+        return session(*a, **k)
+
+    loadtest.session = spy
+    try:
+        res = loadtest.run([3], *synth, ["pages/4_Operations.py", "pages/5_Finance.py"], steps=2)
+    finally:
+        loadtest.session = session
+    level = res["levels"][0]
+    assert level["sessions"] == 3 and level["runs"] == 3 * 3 and level["errors"] == 0, level["error_samples"]
+    assert len({n for n in seen if n.startswith("session")}) > 1
+    assert level["rss_peak_mb"] >= level["rss_before_mb"] > 0
+    # the shared runtime and config patch are undone afterwards
+    assert Runtime._instance is None and config.get_option is get_option
@@ -0,0 +1,65 @@
+import os
+import pandas as pd
+import pytest
+from streamlit.testing.v1 import AppTest
+import ingest, kpi_engine
+from conftest import APP_DIR
+from kpi_defs import KPIS, TILES
+
+PAGES = {"Purchase": "1_Purchase.py", "Sales": "2_Sales.py", "SCM": "3_SCM.py", "Operations": "4_Operations.py",
+         "Finance": "5_Finance.py"}
+
+def _tiles(page, ops, fin):
+    at = AppTest.from_file(os.path.join(APP_DIR, "pages", PAGES[page]), default_timeout=120)
+    at.session_state["ops_path"], at.session_state["fin_path"] = ops, fin
+    at.run()
+    assert not at.exception, at.exception[0].value
+    return {m.label: m.value for m in at.metric}
+
+# the page's own filters (default: every option of the time-filtered OPS rows), applied to both sources
+PAGE_DIMS = {"Purchase": ["supplier"], "Sales": ["customer", "product"], "SCM": ["product", "component"]}
+
+def _rows(data, src, page, page_dims=True):
+    ix = data["index"][src]
+    rows = data["facts"][src].iloc[ix.rows(kpi_engine.default_selection(ix, 12))]
+    oix = data["index"]["OPS"]
+    ops = data["facts"]["OPS"].iloc[oix.rows(kpi_engine.default_selection(oix, 12))]
+    for d in PAGE_DIMS.get(page, []) if page_dims else []:
+        if d in rows.columns and d in ops.columns and ops[d].notna().any():
+            rows = rows[rows[d].isin(ops[d].dropna().unique())]
+    return rows
+
+def _baseline(data, page, page_dims=True):
+    # what the pages computed before the cube/registry: pandas mean or sum of the column over the filtered rows
+    out = {}
+    for p, label, src, kpi, fmt in TILES:
+        if p == page and kpi in data["facts"][src].columns:
+            out[label] = fmt.format(getattr(_rows(data, src, page, page_dims)[kpi], KPIS[kpi][0])())
+    return out
+
+@pytest.mark.parametrize("page", list(PAGES))
+def test_tiles_match_baseline_and_score(synth, loaded, page):
+    assert _tiles(page, *synth) == _baseline(loaded, page)
+    # score() evaluates the same tiles on the time filters alone
+    scored = kpi_engine.score(loaded, 12)
+    scored = scored[(scored["page"] == page) & (scored["dims"] == "")]
+    fmts = {label: fmt for p, label, _, _, fmt in TILES if p == page}
+    base = _baseline(loaded, page, page_dims=False)
+    assert {r.kpi: fmts[r.kpi].format(r.value) for r in scored.itertuples() if r.kpi in base} == base
+
+def test_finance_without_indirect_or_profit(synth, tmp_path):
+    fin = pd.read_excel(synth[1], sheet_name=None)
+    path = str(tmp_path / "fin_no_indirect.xlsx")
+    with pd.ExcelWriter(path) as w:
+        for name, df in fin.items():
+            drop = [c for c in df.columns if ingest.std_col(c) in ("indirect_cost", "operating_profit")]
+            df.drop(columns=drop).to_excel(w, sheet_name=name, index=False)
+    shown = _tiles("Finance", synth[0], path)
+    data = ingest.load_data(synth[0], path)
+    ix = data["index"]["FIN"]
+    rows = data["facts"]["FIN"].iloc[ix.rows(kpi_engine.default_selection(ix, 12))]
+    assert shown["Indirect"] == "0"
+    assert shown["Operating Profit"] == f"{rows['revenue'].sum() - rows['cogs'].sum():,.0f}"
+    scored = kpi_engine.score(data, 12)
+    tiles = scored[(scored["page"] == "Finance") & (scored["dims"] == "")].set_index("kpi")["value"]
+    assert f"{tiles['Operating Profit']:,.0f}" == shown["Operating Profit"] and tiles["Indirect"] == 0
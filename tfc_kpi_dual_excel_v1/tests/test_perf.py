@@ -0,0 +1,59 @@
+import json, threading, time
+import perf
+
+def _run(page, inner=0.01):
+    perf.begin_run(page)
+    perf.stage("load")
+    with perf.span("outer", rows=5) as sp:
+        with perf.span("inner"):
+            time.sleep(inner)
+        sp["bytes"] = 7
+    perf.count("hits", 2)
+    perf.stage("render")
+    perf.count("hits")
+    return perf.end_run()
+
+def test_spans_nest_and_add_up():
+    rec = _run("p")
+    spans = {s["name"]: s for s in rec["spans"]}
+    assert [s["name"] for s in rec["spans"]] == ["load", "outer", "inner", "render"]  # by start time
+    assert [spans[n]["depth"] for n in ("load", "outer", "inner", "render")] == [0, 1, 2, 0]
+    assert spans["inner"]["ms"] >= 10 and spans["outer"]["ms"] >= spans["inner"]["ms"]
+    assert spans["load"]["ms"] >= spans["outer"]["ms"] and spans["render"]["start_ms"] >= spans["load"]["ms"]
+    assert rec["total_ms"] >= spans["load"]["ms"] + spans["render"]["ms"]
+    assert (spans["outer"]["rows"], spans["outer"]["bytes"]) == (5, 7)
+
+def test_runs_are_per_thread():
+    out = {}
+
+    def worker(i):
+        out[i] = _run(f"page{i}", inner=0.02)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    for i, rec in out.items():
+        assert rec["page"] == f"page{i}" and [s["name"] for s in rec["spans"]] == ["load", "outer", "inner", "render"]
+        assert rec["counters"] == {"hits": 3}
+
+def test_counters_reset_between_runs_and_totals_accumulate():
+    before = perf.TOTALS["hits"]
+    assert _run("a")["counters"] == {"hits": 3}
+    assert _run("b")["counters"] == {"hits": 3}
+    perf.begin_run("c")
+    assert perf.end_run()["counters"] == {}
+    assert perf.TOTALS["hits"] - before == 6
+
+def test_end_run_writes_one_log_record(tmp_path, monkeypatch):
+    log = tmp_path / "perf.jsonl"
+    monkeypatch.setattr(perf, "LOG_PATH", str(log))
+    rec = _run("logged")
+    lines = log.read_text().splitlines()
+    assert len(lines) == 1
+    got = json.loads(lines[0])
+    assert set(got) == {"ts", "page", "total_ms", "spans", "counters"}
+    assert got["page"] == "logged" and got["counters"] == {"hits": 3}
+    assert [s["name"] for s in got["spans"]] == [s["name"] for s in rec["spans"]]
+    assert perf.RECENT[-1] is rec
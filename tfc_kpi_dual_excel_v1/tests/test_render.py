@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+from streamlit.testing.v1 import AppTest
+import render
+
+def _series(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({"x": np.arange(n, dtype="float64"), "y": rng.normal(0, 1, n).cumsum(),
+                         "g": pd.Categorical(rng.choice(list("abc"), n)), "extra": rng.normal(0, 1, n)})
+
+@pytest.mark.parametrize("size,n", [(1000, 50), (1000, 3), (101, 100), (10, 10), (10, 50), (10, 2)])
+def test_lttb_keeps_ends_and_returns_n_points_in_order(size, n):
+    df = _series(size)
+    keep = render.lttb(df["x"].to_numpy(), df["y"].to_numpy(), n)
+    assert len(keep) == (n if 3 <= n < size else size)
+    assert keep[0] == 0 and keep[-1] == size - 1
+    assert np.all(np.diff(keep) > 0)
+
+def test_lttb_keeps_a_spike():
+    y = np.zeros(1000)
+    y[437] = 50
+    assert 437 in render.lttb(np.arange(1000, dtype="float64"), y, 20)
+
+def test_line_downsamples_above_the_budget():
+    df = _series(2000).sample(frac=1, random_state=0)  # unsorted input
+    fig = render.line(df, "x", "y", "t", budget=100)
+    assert len(fig.data[0].x) == 100 and np.all(np.diff(fig.data[0].x) > 0)
+    assert "(100 of 2,000 points)" in fig.layout.title.text
+    small = render.line(df.head(50), "x", "y", "t", budget=100)
+    assert list(small.data[0].x) == sorted(df.head(50)["x"]) and small.layout.title.text == "t"
+
+def test_box_aggregates_above_the_budget():
+    df = _series(3000)
+    small = render.box(df.head(100), "g", "y", "t", budget=500)
+    assert len(small.data) == 1 and len(small.data[0].y) == 100 and small.data[0].boxpoints == "all"
+    big = render.box(df, "g", "y", "t", budget=500)
+    box = big.data[0]
+    assert box.boxpoints is False and box.y is None
+    for cat, q1, med, q3 in zip(box.x, box.q1, box.median, box.q3):
+        v = df.loc[df["g"] == cat, "y"]
+        assert np.allclose([q1, med, q3], v.quantile([.25, .5, .75]).to_numpy())
+    assert sum(len(t.x) for t in big.data[1:]) <= 500 and "summarized from 3,000 rows" in big.layout.title.text
+
+def test_paged_dataframe_covers_every_row_once():
+    script = """
+import streamlit as st, pandas as pd, render
+render.paged_dataframe(pd.DataFrame({"i": range(2345)}), key="p", page_rows=500)
+"""
+    at = AppTest.from_string(script).run()
+    pages = int(at.number_input(key="p").max)
+    seen = []
+    for page in range(1, pages + 1):
+        at.number_input(key="p").set_value(page).run()
+        seen += list(at.dataframe[0].value["i"])
+    assert pages == 5 and seen == list(range(2345))
+    small = AppTest.from_string(script.replace("2345", "400")).run()
+    assert not small.number_input and list(small.dataframe[0].value["i"]) == list(range(400))
@@ -0,0 +1,62 @@
+import gc, os
+import numpy as np
+import pandas as pd
+import pytest
+import ingest, kpi_defs
+import sql_backend
+from kpi_cube import KpiCube, ROWS
+
+pytestmark = pytest.mark.skipif(sql_backend.duckdb is None, reason="duckdb not installed")
+
+@pytest.fixture
+def sql_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(sql_backend, "SQL_DIR", str(tmp_path / "sql"))
+    return tmp_path / "sql"
+
+def _cubes(loaded, n):
+    sheets = {k: kpi_defs.with_weights(f) for k, f in loaded[n].items()}
+    metrics = ingest.KPI_COLS + kpi_defs.WEIGHT_COLS
+    return (KpiCube.from_sheets(sheets, ingest.CUBE_DIMS, metrics),
+            sql_backend.SqlCube.from_sheets(sheets, ingest.CUBE_DIMS, metrics))
+
+def _same(a, b, dims):
+    a, b = a.sort_values(dims, ignore_index=True), b.sort_values(dims, ignore_index=True)
+    for d in dims:
+        assert list(a[d].astype(str)) == list(b[d].astype(str))
+    pd.testing.assert_frame_equal(a.drop(columns=dims).astype("float64"), b.drop(columns=dims).astype("float64"))
+
+@pytest.mark.parametrize("n", ["OPS", "FIN"])
+def test_sql_cube_matches_kpi_cube(loaded, sql_dir, n):
+    mem, sql = _cubes(loaded, n)
+    assert sql.keys == mem.keys and sql.metrics == mem.metrics
+    sel = {"round": [mem.parts["round"].dropna().iloc[0]]}
+    for m in mem.metrics:
+        for how in ("sum", "mean"):
+            assert sql.total(m, how) == pytest.approx(mem.total(m, how), nan_ok=True)
+            assert sql.total(m, how, sel) == pytest.approx(mem.total(m, how, sel), nan_ok=True)
+    assert sql.total(ROWS) == mem.total(ROWS)
+    for dims in (["round"], ["week", mem.keys[-1]]):
+        _same(sql.by(dims, mem.metrics + [ROWS], "mean", sel), mem.by(dims, mem.metrics + [ROWS], "mean", sel), dims)
+        _same(sql.partials(dims, mem.metrics), mem.partials(dims, mem.metrics), dims)
+    m = mem.metrics[0]
+    assert list(sql.top("round", m, "sum", 2)[m]) == pytest.approx(list(mem.top("round", m, "sum", 2)[m]))
+    _same(sql.partials([], mem.metrics).assign(k=0), mem.partials([], mem.metrics).assign(k=0), ["k"])
+
+def test_unfingerprinted_sheets_are_named_by_content(sql_dir):
+    frame = pd.DataFrame({"round": [1, 2], "revenue": [1.0, 2.0]})
+    a = sql_backend.sheet_file(frame, ["round"], ["revenue"])
+    assert sql_backend.sheet_file(frame.copy(), ["round"], ["revenue"]) == a
+    assert sql_backend.sheet_file(frame.assign(revenue=[1.0, 3.0]), ["round"], ["revenue"]) != a
+    assert len(os.listdir(sql_dir)) == 2
+
+def test_evict_keeps_files_of_live_cubes(sql_dir):
+    frames = [pd.DataFrame({"round": [i] * 200, "revenue": np.arange(200.0) + i}) for i in range(4)]
+    live = sql_backend.SqlCube.from_sheets({"a": frames[0], "b": frames[1]}, ["round"], ["revenue"])
+    dead = sql_backend.SqlCube.from_sheets({"c": frames[2]}, ["round"], ["revenue"])
+    dead_files = dead.files
+    del dead
+    gc.collect()
+    sql_backend.evict(max_mb=0)
+    assert all(os.path.exists(f) for f in live.files)
+    assert not any(os.path.exists(f) for f in dead_files)
+    assert live.total("revenue", "sum") == pytest.approx(frames[0]["revenue"].sum() + frames[1]["revenue"].sum())
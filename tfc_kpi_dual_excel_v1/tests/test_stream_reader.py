@@ -0,0 +1,30 @@
+
+import pandas as pd
+import pytest
+import ingest
+
+def _both(src):
+    return ingest._parse_workbook_stream(src), ingest._parse_workbook_pandas(src)
+
+def _assert_same(stream, pandas_):
+    assert list(stream) == list(pandas_)
+    for s in stream:
+        a, b = stream[s], pandas_[s]
+        assert list(a.columns) == list(b.columns)
+        pd.testing.assert_frame_equal(a.reset_index(drop=True), b.reset_index(drop=True), check_dtype=False)
+
+def test_stream_matches_pandas_on_samples(sample):
+    for src in sample:
+        _assert_same(*_both(src))
+
+def test_stream_matches_pandas_on_synth(synth):
+    for src in synth:
+        _assert_same(*_both(src))
+
+def test_sheet_subset(synth):
+    ops = synth[0]
+    first = ingest._sheet_names(ops)[0]
+    assert list(ingest.parse_workbook(ops, {first})) == [first]
+
+def test_header_names_follow_pandas():
+    assert ingest._header_names(["a", None, "a", "a"]) == ["a", "Unnamed: 1", "a.1", "a.2"]
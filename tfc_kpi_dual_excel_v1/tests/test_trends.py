@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+import render, trends
+
+def _frame(seed=0, n=500, groups=5):
+    rng = np.random.default_rng(seed)
+    x = rng.normal(50, 10, n)
+    g = rng.integers(0, groups, n)
+    y = (g + 1) * x + rng.normal(0, 5, n) + g * 100
+    df = pd.DataFrame({"x": x, "y": y, "g": pd.Categorical([f"G{i}" for i in g])})
+    df.loc[rng.choice(n, 20, replace=False), "y"] = np.nan
+    df.loc[rng.choice(n, 5, replace=False), "x"] = np.inf
+    return df
+
+def _ref(x, y):
+    ok = np.isfinite(x) & np.isfinite(y)
+    x, y = x[ok], y[ok]
+    slope, intercept = np.polyfit(x, y, 1)
+    r = np.corrcoef(x, y)[0, 1]
+    return {"n": len(x), "slope": slope, "intercept": intercept, "r": r, "r2": r * r}
+
+def test_fit_matches_polyfit_and_corrcoef():
+    df = _frame()
+    got, ref = trends.fit(df["x"], df["y"]), _ref(df["x"].to_numpy(), df["y"].to_numpy())
+    assert got["n"] == ref["n"]
+    assert np.allclose([got[c] for c in trends.FIT_COLS[1:]], [ref[c] for c in trends.FIT_COLS[1:]])
+
+def test_fit_is_precise_far_from_the_origin():
+    # centred second pass: a large offset must not cost the slope its digits
+    x = np.arange(100, dtype="float64") + 1e9
+    got = trends.fit(x, 3 * x - 7)
+    assert got["slope"] == pytest.approx(3, rel=1e-9) and got["r"] == pytest.approx(1, rel=1e-12)
+
+@pytest.mark.parametrize("x,y", [([], []), ([1.0], [2.0]), ([2.0, 2.0, 2.0], [1.0, 2.0, 3.0])])
+def test_degenerate_fits_are_nan(x, y):
+    got = trends.fit(x, y)
+    assert got["n"] == len(x) and np.isnan(got["slope"]) and np.isnan(got["r"])
+
+def test_group_fits_match_per_group_polyfit():
+    df = _frame(1)
+    got = trends.fits(df, "x", "y", by="g").set_index("g")
+    assert list(got.columns) == trends.FIT_COLS
+    for g, part in df.groupby("g", observed=True):
+        ref = _ref(part["x"].to_numpy(), part["y"].to_numpy())
+        assert got.loc[g, "n"] == ref["n"]
+        assert np.allclose([got.loc[g, c] for c in trends.FIT_COLS[1:]], [ref[c] for c in trends.FIT_COLS[1:]])
+
+def test_group_fits_drop_empty_groups_and_accept_plain_columns():
+    df = _frame(2)
+    df["g"] = df["g"].cat.add_categories(["unused"])
+    got = trends.fits(df, "x", "y", by="g")
+    assert "unused" not in set(got["g"]) and (got["n"] > 0).all()
+    plain = trends.fits(df.assign(g=df["g"].astype(str)), "x", "y", by="g")
+    assert np.allclose(plain.set_index("g").loc[got["g"], "slope"], got["slope"])
+
+def test_fits_memo_is_per_frame_object():
+    df = _frame(3)
+    first = trends.fits(df, "x", "y")
+    assert trends.fits(df, "x", "y") is first
+    assert trends.fits(df.copy(), "x", "y") is not first
+    assert trends.fits(df, "x", "y", by="g") is not first
+    assert trends.fits(df.iloc[:0], "x", "y")["n"].isna().all()
+
+def test_corr_matches_pandas_on_complete_rows():
+    df = _frame(4).replace([np.inf, -np.inf], np.nan)
+    df["z"] = df["x"] * -2 + 1
+    got = trends.corr(df, ["x", "y", "z"])
+    assert np.allclose(got.to_numpy(), df[["x", "y", "z"]].dropna().corr().to_numpy())
+    assert trends.corr(df.iloc[:1], ["x", "y"]).isna().all().all()
+
+def test_scatter_trendline_uses_the_fit():
+    df = _frame(5).replace([np.inf, -np.inf], np.nan).dropna(subset=["x", "y"])
+    fig = render.scatter(df, "x", "y", "t")
+    line = fig.data[-1]
+    f = trends.fit(df["x"], df["y"])
+    assert len(fig.data) == 2 and np.all(np.diff(line.x) >= 0)
+    assert np.allclose(line.y, f["slope"] * np.asarray(line.x) + f["intercept"])
@@ -0,0 +1,68 @@
+import os, time
+import pytest
+import upload_store
+
+class _Upload:
+    def __init__(self, data: bytes, file_id: str):
+        self.data, self.file_id, self.reads = data, file_id, 0
+
+    def getvalue(self):
+        self.reads += 1
+        return self.data
+
+@pytest.fixture
+def spool_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(upload_store, "SPOOL_DIR", str(tmp_path / "uploads"))
+    monkeypatch.setattr(upload_store, "_by_file_id", upload_store.OrderedDict())
+    return tmp_path / "uploads"
+
+def test_spool_is_content_addressed_and_hashed_once(spool_dir):
+    a, b = _Upload(b"workbook", "id-a"), _Upload(b"workbook", "id-b")
+    pa = upload_store.spool(a)
+    assert upload_store.spool(a) == pa and a.reads == 1
+    assert upload_store.spool(b) == pa and upload_store.is_spooled(pa)
+    with open(pa, "rb") as f:
+        assert f.read() == b"workbook"
+
+def test_touch_stamps_mtime_and_cleanup_keeps_used_files(spool_dir):
+    used, idle = upload_store.spool(_Upload(b"used", "u")), upload_store.spool(_Upload(b"idle", "i"))
+    old = time.time() - 2 * 3600
+    for p in (used, idle):
+        os.utime(p, (old, old))
+    assert upload_store.touch(used)  # what another process' loader does
+    assert upload_store.cleanup(ttl_hours=1, force=True) == 1
+    assert os.path.exists(used) and not os.path.exists(idle)
+    assert list(upload_store._by_file_id) == ["u"]
+    assert not upload_store.touch(idle)
+
+def test_swept_upload_is_respooled(spool_dir):
+    up = _Upload(b"again", "x")
+    path = upload_store.spool(up)
+    os.remove(path)  # swept by another process
+    assert upload_store.spool(up) == path and os.path.exists(path) and up.reads == 2
+
+def test_file_id_map_is_capped(spool_dir, monkeypatch):
+    monkeypatch.setattr(upload_store, "FILE_IDS_MAX", 3)
+    for i in range(5):
+        upload_store.spool(_Upload(b"same", f"id{i}"))
+    assert list(upload_store._by_file_id) == ["id2", "id3", "id4"]
+
+def test_page_reports_a_vanished_upload(synth, spool_dir):
+    from streamlit.testing.v1 import AppTest
+    from conftest import APP_DIR
+    at = AppTest.from_file(os.path.join(APP_DIR, "pages", "2_Sales.py"), default_timeout=120)
+    at.session_state["ops_path"], at.session_state["fin_path"] = synth
+    at.session_state["ops_up"] = os.path.join(upload_store.SPOOL_DIR, "0" * 64 + ".xlsx")
+    at.run()
+    assert not at.exception and len(at.error) == 1 and "upload it again" in at.error[0].value
+    assert not at.metric
+
+def test_upload_reuses_the_dataset_whatever_path_is_selected(synth, spool_dir):
+    import perf, utils_dual_v2
+    with open(synth[0], "rb") as f:
+        up = upload_store.spool(_Upload(f.read(), "ops-upload"))
+    perf.begin_run("test")
+    first = utils_dual_v2.load_sources(synth[0], synth[1], up, None)
+    again = utils_dual_v2.load_sources(synth[1], synth[1], up, None)
+    counters = perf.end_run()["counters"]
+    assert again is first and counters["load_sources.hit"] == 1
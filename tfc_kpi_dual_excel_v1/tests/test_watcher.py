@@ -0,0 +1,84 @@
+import json, os, shutil, threading, time
+from collections import OrderedDict
+import pytest
+import kpi_cube, ingest, sql_backend, watcher
+
+def test_warm_leaves_nothing_for_build_cube(synth, tmp_path, monkeypatch):
+    # not warmed by other tests' loads: fresh partials memo (pandas) and Parquet dir (TFC_BACKEND=duckdb)
+    monkeypatch.setattr(kpi_cube, "_PARTIALS_MEMO", OrderedDict())
+    monkeypatch.setattr(sql_backend, "SQL_DIR", str(tmp_path / "sql"))
+    watcher.warm(synth[0])
+    aggregated = _spy(monkeypatch, kpi_cube, "_partials")
+    written = _spy(monkeypatch, sql_backend, "_normalize")
+    cube = ingest.build_cube(ingest.parse_workbooks_cached([synth[0]])[0])
+    assert aggregated == [] and written == [] and cube.metrics
+
+@pytest.fixture
+def root(tmp_path, monkeypatch):
+    monkeypatch.setattr(watcher, "INDEX_PATH", str(tmp_path / "cache" / "candidates.json"))
+    monkeypatch.setattr(watcher, "SETTLE", 0)
+    d = tmp_path / "data"
+    d.mkdir()
+    return d
+
+def _spy(monkeypatch, module, name):
+    calls, real = [], getattr(module, name)
+    monkeypatch.setattr(module, name, lambda *a, **k: calls.append(a) or real(*a, **k))
+    return calls
+
+def test_poll_picks_up_new_workbooks_once(synth, root, monkeypatch):
+    w = watcher.Watcher([str(root)])
+    assert w.poll_once() == [] and watcher.read_index() == []
+    path = str(root / "ops.xlsx")
+    shutil.copy(synth[0], path)
+    warmed = _spy(monkeypatch, watcher, "warm")
+    assert w.poll_once() == [path] and w.files[path]["sheets"] == 3
+    assert w.poll_once() == [] and len(warmed) == 1  # unchanged: not parsed again
+    os.utime(path, ns=(time.time_ns(), time.time_ns() - 10**9))
+    assert w.poll_once() == [path] and len(warmed) == 2  # touched: picked up again
+
+def test_index_lists_files_with_their_stamp(synth, root):
+    path = str(root / "ops.xlsx")
+    shutil.copy(synth[0], path)
+    w = watcher.Watcher([str(root)])
+    w.poll_once()
+    with open(watcher.INDEX_PATH) as f:
+        meta = json.load(f)
+    st = os.stat(path)
+    assert meta["roots"] == [str(root)] and time.time() - meta["updated"] < 60
+    assert meta["files"] == [{"path": path, "mtime_ns": st.st_mtime_ns, "size": st.st_size, "sheets": 3}]
+    assert watcher.read_index() == [path]
+    assert watcher.read_index(max_age=-1) is None  # stale index: nobody is refreshing it
+
+def test_warmed_workbook_is_a_cache_hit(synth, root, monkeypatch):
+    path = str(root / "fin.xlsx")
+    shutil.copy(synth[1], path)
+    watcher.Watcher([str(root)]).poll_once()
+    parsed = _spy(monkeypatch, ingest, "parse_workbooks")
+    sheets = ingest.parse_workbooks_cached([path])[0]
+    assert sheets and all(not srcs for srcs, *_ in parsed)
+
+def test_memos_survive_concurrent_use(loaded, monkeypatch):
+    # the watcher fills the memos while sessions read them
+    sheets = [f.copy() for f in loaded["OPS"].values()]
+    monkeypatch.setattr(ingest, "FACT_MEMO_ROWS", max(len(f) for f in sheets))  # one or two sheets fit
+    monkeypatch.setattr(kpi_cube, "_PARTIALS_MAX", 2)
+    for k, sdf in enumerate(sheets):
+        sdf.attrs["fingerprint"] = f"hammer-{k}"
+    errors = []
+
+    def hammer(i):
+        try:
+            for j in range(30):
+                sdf = sheets[(i + j) % len(sheets)]
+                ingest._typed_sheet(sdf)
+                kpi_cube.KpiCube._sheet_partials(sdf, ingest.CUBE_DIMS, ingest.KPI_COLS)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=hammer, args=(i,)) for i in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
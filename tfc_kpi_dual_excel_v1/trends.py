@@ -0,0 +1,70 @@
+
+import threading, weakref
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from typing import Dict, Optional
+
+FIT_COLS = ["n", "slope", "intercept", "r", "r2"]
+_MEMO: "OrderedDict[tuple, tuple]" = OrderedDict()
+_MEMO_MAX = 256
+_lock = threading.Lock()
+
+def group_fits(x: np.ndarray, y: np.ndarray, codes: np.ndarray, size: int) -> pd.DataFrame:
+    # least squares y = slope * x + intercept and Pearson r for every group at once (rows with code -1 or a
+    # non-finite x/y are ignored); two bincount passes, the second on group-centred values for precision
+    x, y = np.asarray(x, dtype="float64"), np.asarray(y, dtype="float64")
+    ok = (codes >= 0) & np.isfinite(x) & np.isfinite(y)
+    x, y, c = x[ok], y[ok], codes[ok]
+    n = np.bincount(c, minlength=size).astype("float64")
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mx = np.bincount(c, weights=x, minlength=size) / n
+        my = np.bincount(c, weights=y, minlength=size) / n
+        dx, dy = x - mx[c], y - my[c]
+        sxx = np.bincount(c, weights=dx * dx, minlength=size)
+        sxy = np.bincount(c, weights=dx * dy, minlength=size)
+        syy = np.bincount(c, weights=dy * dy, minlength=size)
+        slope = np.where((n >= 2) & (sxx > 0), sxy / sxx, np.nan)
+        r = np.where((sxx > 0) & (syy > 0), sxy / np.sqrt(sxx * syy), np.nan)
+    return pd.DataFrame({"n": n.astype("int64"), "slope": slope, "intercept": my - slope * mx, "r": r, "r2": r * r})
+
+def fit(x, y) -> Dict[str, float]:
+    # one fit: n, slope, intercept, r, r2 (NaN when fewer than two distinct x values)
+    x = np.asarray(x, dtype="float64")
+    return group_fits(x, y, np.zeros(len(x), dtype=np.intp), 1).iloc[0].to_dict()
+
+def fits(df: pd.DataFrame, x: str, y: str, by: Optional[str] = None) -> pd.DataFrame:
+    # FIT_COLS per group of by (one row without by), memoized on the frame itself: the cubes and join
+    # indexes hand out the same frame object for the same selection, so reruns reuse the fit
+    key = (id(df), x, y, by)
+    with _lock:
+        hit = _MEMO.get(key)
+        if hit is not None and hit[0]() is df:
+            _MEMO.move_to_end(key)
+            return hit[1]
+    if by is None:
+        out = pd.DataFrame([fit(df[x], df[y]) if len(df) else dict.fromkeys(FIT_COLS, np.nan)])[FIT_COLS]
+    else:
+        col = df[by] if isinstance(df[by].dtype, pd.CategoricalDtype) else df[by].astype("category")
+        cats = col.cat.categories
+        out = group_fits(df[x].to_numpy(dtype="float64"), df[y].to_numpy(dtype="float64"),
+                         col.cat.codes.to_numpy(), len(cats))
+        out.insert(0, by, cats)
+        out = out[out["n"] > 0].reset_index(drop=True)
+    try:
+        ref = weakref.ref(df)
+    except TypeError:
+        return out
+    with _lock:
+        _MEMO[key] = (ref, out)
+        while len(_MEMO) > _MEMO_MAX:
+            _MEMO.popitem(last=False)
+    return out
+
+def corr(df: pd.DataFrame, cols) -> pd.DataFrame:
+    # Pearson correlation matrix over rows where every column is finite
+    v = df[list(cols)].to_numpy(dtype="float64")
+    v = v[np.isfinite(v).all(axis=1)]
+    if len(v) < 2:
+        return pd.DataFrame(np.nan, index=list(cols), columns=list(cols))
+    return pd.DataFrame(np.corrcoef(v, rowvar=False), index=list(cols), columns=list(cols))
@@ -0,0 +1,77 @@
+
+import os, time, hashlib, threading
+from collections import OrderedDict
+from typing import Optional
+import disk_cache
+
+SPOOL_DIR = os.path.join(disk_cache.CACHE_DIR, "uploads")
+TTL_HOURS = float(os.environ.get("TFC_UPLOAD_TTL_HOURS", "24"))  # spooled uploads unused this long are deleted
+CLEANUP_EVERY = 600.0  # seconds between cleanup sweeps
+
+FILE_IDS_MAX = 1024  # remembered uploader file_ids (oldest forgotten first; a forgotten upload is rehashed)
+
+# uploader file_id -> spooled path, so each upload is hashed once. The last-used stamp is the file's mtime,
+# shared by every server process using the spool directory (a path is content-addressed, so its mtime keys
+# nothing else)
+_by_file_id: "OrderedDict[str, str]" = OrderedDict()
+_lock = threading.Lock()
+_last_sweep = 0.0
+
+def spool(uploaded) -> str:
+    # writes an st.file_uploader file to <spool>/<sha256>.xlsx once and returns that path;
+    # identical uploads from any session land on the same path (and the same cached dataset)
+    file_id = getattr(uploaded, "file_id", None)
+    with _lock:
+        path = _by_file_id.get(file_id) if file_id else None
+        if path is not None:
+            _by_file_id.move_to_end(file_id)
+    if path is None or not touch(path):
+        payload = uploaded.getvalue()
+        path = os.path.join(SPOOL_DIR, hashlib.sha256(payload).hexdigest() + ".xlsx")
+        if not touch(path):  # not spooled yet, or swept since: (re)write it
+            os.makedirs(SPOOL_DIR, exist_ok=True)
+            tmp = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+            with open(tmp, "wb") as f:
+                f.write(payload)
+            os.replace(tmp, path)
+        if file_id:
+            with _lock:
+                _by_file_id[file_id] = path
+                while len(_by_file_id) > FILE_IDS_MAX:
+                    _by_file_id.popitem(last=False)
+    cleanup()
+    return path
+
+def is_spooled(path) -> bool:
+    return isinstance(path, str) and os.path.dirname(os.path.abspath(path)) == os.path.abspath(SPOOL_DIR)
+
+def touch(path: str) -> bool:
+    # marks a spooled upload as in use for every process sharing the spool (its mtime); False when it is gone
+    try:
+        os.utime(path)
+        return True
+    except OSError:
+        return False
+
+def cleanup(ttl_hours: Optional[float] = None, force: bool = False) -> int:
+    # deletes spooled uploads not written or touched within the TTL; returns how many
+    global _last_sweep
+    now = time.time()
+    if not force and now - _last_sweep < CLEANUP_EVERY:
+        return 0
+    _last_sweep = now
+    ttl = (TTL_HOURS if ttl_hours is None else ttl_hours) * 3600
+    removed = 0
+    if not os.path.isdir(SPOOL_DIR):
+        return 0
+    for e in os.scandir(SPOOL_DIR):
+        try:
+            if now - e.stat().st_mtime > ttl:
+                os.remove(e.path)
+                removed += 1
+                with _lock:
+                    for k in [k for k, p in _by_file_id.items() if p == e.path]:
+                        del _by_file_id[k]
+        except OSError:
+            pass  # raced with another process' sweep
+    return removed
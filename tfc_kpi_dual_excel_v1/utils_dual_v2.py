@@ -1,155 +1,123 @@
 
 import streamlit as st
 import pandas as pd
-import numpy as np
-import re, glob, os
-from typing import Dict, List, Tuple, Optional
+import os
+from types import MappingProxyType
+from typing import Dict, Optional
+import watcher
+import perf
+import upload_store
+import kpi_defs
+from filter_index import FilterIndex
+# the data layer lives in ingest (no streamlit import); re-exported here for existing callers
+from ingest import (ALIAS, FALLBACK_RULES, ALIAS_VERSION, std_col, resolve_columns, list_candidate_excels,
+                    parse_workbook, parse_workbooks, parse_workbooks_cached, build_fact, load_data, coerce_num,
+                    DIM_COLS, CATEGORY_COLS, KPI_COLS, CUBE_DIMS)
 
-ALIAS = {
-    "round": ["round","period","cycle"],
-    "week": ["week","wk"],
-    "date": ["date","day","timestamp"],
-    "customer": ["customer","client","channel","account"],
-    "product": ["product","sku","item","fg","finished good","finished_goods","fg_sku"],
-    "component": ["component","rawmaterial","raw_material","rm","ingredient","material"],
-    "supplier": ["supplier","vendor"],
-    "plant": ["plant","factory","site","production_site","mixing","bottling"],
-    "warehouse": ["warehouse","dc","inbound_warehouse","outbound_warehouse"],
-    "order_qty": ["orderqty","order_qty","ordered_qty","orders","demand_qty","demand"],
-    "delivered_qty": ["deliveredqty","delivered_qty","ship_qty","shipped_qty","deliveries"],
-    "backorder_qty": ["backorderqty","backorder_qty","bo_qty","backorders"],
-    "revenue": ["realizedrevenue","revenue","sales_value","sales"],
-    "price": ["price","unit_price","selling_price"],
-    "discount": ["discount","disc_pct","discount_pct"],
-    "cogs": ["cogs","cost_of_goods_sold","cost of goods sold","product_cost"],
-    "indirect_cost": ["indirectcost","indirect_cost","overhead","opex"],
-    "operating_profit": ["operatingprofit","operating_profit","net_profit","profit","ebit"],
-    "capital_employed": ["capitalemployed","capital_employed","cap_employed"],
-    "roi_pct": ["roi_pct","roi%","roi","return_on_investment"],
-    "service_level_pct": ["servicelevelpct","service_level_pct","service_level","fill_rate","fillrate"],
-    "shelf_life_days": ["shelflifeachieveddays","shelf_life_days","shelf_life","shelflife"],
-    "forecast": ["forecast","fcst"],
-    "forecast_error_pct": ["forecasterrorpct","forecast_error_pct","mape","forecast_error"],
-    "obsolescence_qty": ["obsolescenceqty","obsolete_qty","obsolescence_qty"],
-    "obsolescence_value": ["obsolescencevalue","obsolete_value","obsolescence_value"],
-    "component_availability_pct": ["componentavailabilitypct","component_availability_pct"],
-    "product_availability_pct": ["productavailabilitypct","product_availability_pct","availability"],
-    "delivery_reliability_pct": ["deliveryreliabilitypct","delivery_reliability_pct","on_time_delivery_pct"],
-    "rejection_pct": ["rejectionpct","rejection_pct","reject_rate_pct","quality_reject_pct"],
-    "component_obsolete_pct": ["componentobsoletepct","component_obsolete_pct"],
-    "raw_material_cost_pct": ["rawmaterialcostpct","raw_material_cost_pct","rm_cost_pct"],
-    "inbound_cube_util_pct": ["inboundcubeutilpct","inbound_cube_util_pct","inbound_util_pct"],
-    "outbound_cube_util_pct": ["outboundcubeutilpct","outbound_cube_util_pct","outbound_util_pct"],
-    "mixing_util_pct": ["mixingutilpct","mixing_util_pct"],
-    "bottling_util_pct": ["bottlingutilpct","bottling_util_pct"],
-    "plan_adherence_pct": ["productionplanadherencepct","plan_adherence_pct","schedule_adherence_pct"],
-}
+WATCH = os.environ.get("TFC_WATCH", "1") != "0"  # background directory watcher (watcher.py)
 
-_alias_rev = {re.sub(r'[^a-z0-9]+','',v):k for k,vals in ALIAS.items() for v in vals}
-def _n(s): return re.sub(r'[^a-z0-9]+','',str(s).strip().lower())
-def std_col(c):
-    n=_n(c)
-    if n in _alias_rev: return _alias_rev[n]
-    # fallbacks
-    if n.endswith("pct"):
-        if "service" in n or "fill" in n: return "service_level_pct"
-        if "availability" in n and "product" in n: return "product_availability_pct"
-        if "availability" in n and "component" in n: return "component_availability_pct"
-        if "ontime" in n or "reliab" in n: return "delivery_reliability_pct"
-        if "reject" in n: return "rejection_pct"
-        if "obsolete" in n and "component" in n: return "component_obsolete_pct"
-        if "util" in n and "inbound" in n: return "inbound_cube_util_pct"
-        if "util" in n and "outbound" in n: return "outbound_cube_util_pct"
-        if "util" in n and "mix" in n: return "mixing_util_pct"
-        if "util" in n and "bottling" in n: return "bottling_util_pct"
-        if "adherence" in n or "schedule" in n: return "plan_adherence_pct"
-        if "roi" in n: return "roi_pct"
-        if "raw" in n and "cost" in n: return "raw_material_cost_pct"
-    if "order" in n and "qty" in n: return "order_qty"
-    if ("deliver" in n or "ship" in n) and "qty" in n: return "delivered_qty"
-    if "backorder" in n and "qty" in n: return "backorder_qty"
-    if "obsolesc" in n and "qty" in n: return "obsolescence_qty"
-    if "obsolesc" in n and "val" in n: return "obsolescence_value"
-    if "revenue" in n or n=="sales": return "revenue"
-    if "cogs" in n or "costofgoods" in n: return "cogs"
-    if "overhead" in n or "indirect" in n or n=="opex": return "indirect_cost"
-    if "profit" in n or "ebit" in n: return "operating_profit"
-    if n in ["sku","fgsku","fg","item"]: return "product"
-    if "customer" in n or "client" in n or "channel" in n: return "customer"
-    if "supplier" in n or "vendor" in n: return "supplier"
-    if "component" in n or "material" in n or "raw" in n: return "component"
-    if "plant" in n or "factory" in n or "site" in n: return "plant"
-    if "warehouse" in n or n in ["dc","inboundwarehouse","outboundwarehouse"]: return "warehouse"
-    if n.startswith("week") or n=="wk": return "week"
-    if n in ["round","period","cycle"]: return "round"
-    if "date" in n or "timestamp" in n or n=="day": return "date"
-    if "forecast" in n and "error" in n: return "forecast_error_pct"
-    if n=="forecast" or "fcst" in n: return "forecast"
-    if "shelf" in n: return "shelf_life_days"
-    if n=="price" or "unitprice" in n: return "price"
-    if "discount" in n: return "discount"
-    if "capital" in n and "employed" in n: return "capital_employed"
-    if "roi" in n: return "roi_pct"
+@st.cache_resource(show_spinner=False)
+def start_watcher()->Optional[watcher.Watcher]:
+    # one background watcher per server process (TFC_WATCH=0 when running watcher.py separately)
+    return watcher.Watcher().start() if WATCH else None
+
+def _source_stamp(src):
+    # paths are cache arguments by name only; the stamp makes a replaced export a new entry
+    if isinstance(src, (str, os.PathLike)):
+        try:
+            st_ = os.stat(src)
+        except OSError:
+            return None
+        return (st_.st_mtime_ns, st_.st_size)
     return None
 
-def list_candidate_excels()->List[str]:
-    # find .xlsx files in cwd and /data (non-hidden)
-    files = []
-    for root in [".", "data"]:
-        for p in glob.glob(os.path.join(root, "*.xlsx")):
-            files.append(p)
-    return sorted(list(dict.fromkeys(files)))  # unique, stable order
+def _freeze(data: dict)->MappingProxyType:
+    # one dataset per process, handed to every session as is: read-only mappings, frozen row arrays
+    for ix in data["index"].values():
+        ix.freeze()
+    for j in data["joins"].values():
+        j.freeze()
+    return MappingProxyType({k: MappingProxyType(v) for k, v in data.items()})
 
-def parse_workbook(fileobj_or_path)->Dict[str,pd.DataFrame]:
-    import pandas as pd
-    try:
-        xls = pd.ExcelFile(fileobj_or_path)
-    except Exception:
-        return {}
-    out={}
-    for s in xls.sheet_names:
-        try:
-            df = xls.parse(s)
-        except Exception:
-            continue
-        if df.empty: 
-            continue
-        mapped={}
-        for c in df.columns:
-            key = std_col(c)
-            if key and key not in mapped:
-                mapped[key]=df[c]
-        if mapped:
-            sdf=pd.DataFrame(mapped)
-            sdf["__sheet"]=s
-            out[s]=sdf
-    return out
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _load_sources(src_ops:Optional[str], src_fin:Optional[str], stamps=None):
+    perf.count("load_sources.miss")  # only runs when the shared cache has no entry
+    return _freeze(load_data(src_ops, src_fin))
 
-@st.cache_data(show_spinner=False)
 def load_sources(selected_ops:Optional[str], selected_fin:Optional[str], uploaded_ops, uploaded_fin):
-    # Allow uploaded overrides
+    # Allow uploaded overrides; the cache key is the workbook each slot actually loads, so switching the
+    # selected path under an upload reuses the dataset
     src_ops = uploaded_ops if uploaded_ops is not None else selected_ops
     src_fin = uploaded_fin if uploaded_fin is not None else selected_fin
-    data={"OPS":{}, "FIN":{}}
-    if src_ops is not None:
-        data["OPS"]=parse_workbook(src_ops)
-    if src_fin is not None:
-        data["FIN"]=parse_workbook(src_fin)
+    for up in (uploaded_ops, uploaded_fin):
+        # touching keeps it clear of the TTL sweep while sessions use it; a swept upload is not silently empty
+        if upload_store.is_spooled(up) and not upload_store.touch(up):
+            st.error("An uploaded workbook is no longer available on the server (unused past the upload TTL). "
+                     "Please upload it again on the main page.")
+            st.stop()
+    # spooled uploads are content-addressed and their mtime is the last-used stamp, so only selected paths are stamped
+    stamps = tuple(None if upload_store.is_spooled(src) else _source_stamp(src) for src in (src_ops, src_fin))
+    counters = perf.current()["counters"]
+    misses = counters["load_sources.miss"]
+    with perf.span("load_sources") as sp:
+        data = _load_sources(src_ops, src_fin, stamps)
+        sp["cache"] = "hit" if counters["load_sources.miss"] == misses else "miss"
+        sp["rows"] = sum(len(f) for f in data["facts"].values())
+    if sp["cache"] == "hit":
+        perf.count("load_sources.hit")
     return data
 
-def coerce_num(df: pd.DataFrame, cols: List[str]) -> pd.DataFrame:
-    for c in cols:
-        if c in df.columns:
-            df[c] = pd.to_numeric(df[c], errors="coerce")
-    return df
+def perf_page(page: str):
+    # start of a page run: spans and counters until perf_panel() belong to this page
+    perf.begin_run(page)
 
-def add_time_filters(df: pd.DataFrame):
+def perf_panel():
+    # optional sidebar debug panel (TFC_DEBUG=1 opens it by default); closes and logs the run
+    on = st.sidebar.checkbox("⏱ Performance panel", value=perf.DEBUG, key="perf_panel")
+    record = perf.end_run()
+    if not on:
+        return
+    with st.sidebar.expander(f"⏱ This run: {record['total_ms']:.0f} ms", expanded=True):
+        spans = pd.DataFrame([{"span": "· " * s["depth"] + s["name"], "ms": round(s["ms"], 1),
+                               "rows": s.get("rows"), "bytes": s.get("bytes"), "cache": s.get("cache", "")}
+                              for s in record["spans"]])
+        st.dataframe(spans, hide_index=True)
+        st.write("Counters", record["counters"])
+    with st.sidebar.expander(f"🔥 Hot spans (last {len(perf.RECENT)} runs)"):
+        st.dataframe(pd.DataFrame(perf.hot_spans(list(perf.RECENT))), hide_index=True)
+        st.write("Totals since start", dict(perf.TOTALS))
+        if perf.LOG_PATH:
+            st.caption(f"Structured log: {perf.LOG_PATH}")
+
+def time_filter_selection(df: pd.DataFrame, index: Optional[FilterIndex]=None, key: Optional[str]=None)->Dict[str,list]:
+    # key tells the OPS and FIN filter pairs of one page apart when both offer the same rounds/weeks
     c1,c2 = st.columns(2)
-    rounds = sorted(df.get("round", pd.Series([], dtype=object)).dropna().unique().tolist())
-    weeks = sorted(df.get("week", pd.Series([], dtype=object)).dropna().unique().tolist())
-    rsel = c1.multiselect("Round", rounds, default=rounds)
-    wsel = c2.multiselect("Week", weeks, default=weeks[-12:] if len(weeks)>12 else weeks)
+    if index is not None:
+        rounds, weeks = sorted(index.options("round")), sorted(index.options("week"))
+    else:
+        rounds = sorted(df.get("round", pd.Series([], dtype=object)).dropna().unique().tolist())
+        weeks = sorted(df.get("week", pd.Series([], dtype=object)).dropna().unique().tolist())
+    rsel = c1.multiselect("Round", rounds, default=rounds, key=f"{key}_round" if key else None)
+    wsel = c2.multiselect("Week", weeks, default=weeks[-12:] if len(weeks)>12 else weeks, key=f"{key}_week" if key else None)
+    return {"round": rsel, "week": wsel}
+
+def add_time_filters(df: pd.DataFrame, index: Optional[FilterIndex]=None, key: Optional[str]=None):
+    sel = time_filter_selection(df, index, key)
+    if index is not None:
+        return index.take(df, index.rows(sel))
     mask = pd.Series(True, index=df.index)
-    if "round" in df.columns and rsel: mask &= df["round"].isin(rsel)
-    if "week" in df.columns and wsel: mask &= df["week"].isin(wsel)
+    if "round" in df.columns and sel["round"]: mask &= df["round"].isin(sel["round"])
+    if "week" in df.columns and sel["week"]: mask &= df["week"].isin(sel["week"])
     return df[mask]
+
+def kpi_tiles(page: str, data, sels: Dict[str, dict], missing: Optional[str]=None):
+    # the page's st.metric tiles from kpi_defs.TILES, one KPI engine pass per source; a KPI the workbooks
+    # can't provide (own column, fallback or default) leaves its column empty, or shows `missing`
+    tiles = [t for t in kpi_defs.TILES if t[0] == page]
+    kpis = data["kpis"]
+    vals = {src: kpis[src].total([t[3] for t in tiles if t[2] == src], sels.get(src)) for src in {t[2] for t in tiles}}
+    for col, (_, label, src, kpi, fmt) in zip(st.columns(len(tiles)), tiles):
+        if kpis[src].available(kpi):
+            col.metric(label, fmt.format(vals[src][kpi]))
+        elif missing is not None:
+            col.metric(label, missing)
@@ -0,0 +1,118 @@
+
+import os, glob, json, time, threading
+from typing import Dict, List, Optional, Tuple
+import disk_cache
+
+ROOTS = [".", "data"]
+INTERVAL = float(os.environ.get("TFC_WATCH_INTERVAL", "5"))  # seconds between directory scans
+SETTLE = float(os.environ.get("TFC_WATCH_SETTLE", "2"))      # skip files still being written
+INDEX_PATH = os.path.join(disk_cache.CACHE_DIR, "candidates.json")
+
+def scan(roots: List[str] = ROOTS) -> Dict[str, Tuple[int, int]]:
+    # same candidates as the old glob in list_candidate_excels, with a (mtime_ns, size) stamp each
+    out = {}
+    for root in roots:
+        for p in glob.glob(os.path.join(root, "*.xlsx")):
+            try:
+                st_ = os.stat(p)
+            except OSError:
+                continue
+            out.setdefault(p, (st_.st_mtime_ns, st_.st_size))
+    return out
+
+def write_index(files: Dict[str, dict], roots: List[str]) -> None:
+    os.makedirs(os.path.dirname(INDEX_PATH) or ".", exist_ok=True)
+    tmp = f"{INDEX_PATH}.tmp-{os.getpid()}-{threading.get_ident()}"
+    with open(tmp, "w") as f:
+        json.dump({"roots": roots, "updated": time.time(), "files": [dict(path=p, **meta) for p, meta in sorted(files.items())]}, f)
+    os.replace(tmp, INDEX_PATH)
+
+def read_index(max_age: Optional[float] = None) -> Optional[List[str]]:
+    # candidate paths from a live watcher; None when there is no index or nobody is refreshing it
+    max_age = max(3 * INTERVAL, 15.0) if max_age is None else max_age
+    try:
+        if time.time() - os.stat(INDEX_PATH).st_mtime > max_age:
+            return None
+        with open(INDEX_PATH) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return [e["path"] for e in meta.get("files", [])]
+
+def warm(path: str) -> int:
+    # parse into the disk cache (per-sheet entries) and build the cube the way the pages do, so the
+    # partials memo (or the duckdb Parquet files) hold exactly what a session will ask for
+    import ingest
+    sheets = ingest.parse_workbooks_cached([path])[0]
+    ingest.build_cube(sheets)
+    return len(sheets)
+
+class Watcher:
+    # polls the roots, keeps INDEX_PATH current and pre-parses new or changed workbooks
+    def __init__(self, roots: List[str] = ROOTS, interval: float = INTERVAL):
+        self.roots, self.interval = list(roots), interval
+        self.files: Dict[str, dict] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def poll_once(self) -> List[str]:
+        now = time.time_ns()
+        seen = scan(self.roots)
+        changed = [p for p, (mtime, size) in seen.items()
+                   if (self.files.get(p, {}).get("mtime_ns"), self.files.get(p, {}).get("size")) != (mtime, size)]
+        if changed or set(self.files) != set(seen):
+            self.files = {p: (self.files[p] if p not in changed else {"mtime_ns": m, "size": s, "sheets": None})
+                          for p, (m, s) in seen.items()}
+            write_index(self.files, self.roots)  # list new files before the (slow) warm-up
+        elif os.path.exists(INDEX_PATH):
+            os.utime(INDEX_PATH)  # heartbeat for read_index
+        else:
+            write_index(self.files, self.roots)
+        warmed = []
+        for p in [p for p, meta in self.files.items() if meta["sheets"] is None]:
+            if now - self.files[p]["mtime_ns"] < SETTLE * 1e9:
+                continue  # picked up again on the next poll once the writer is done
+            try:
+                self.files[p]["sheets"] = warm(p)
+            except Exception:
+                self.files[p]["sheets"] = 0
+            warmed.append(p)
+        if warmed:
+            write_index(self.files, self.roots)
+        return warmed
+
+    def run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.poll_once()
+            except OSError:
+                pass  # unreadable root or cache dir: try again next round
+            self._stop.wait(self.interval)
+
+    def start(self) -> "Watcher":
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self.run, name="tfc-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+if __name__ == "__main__":
+    # python watcher.py [--once] [--interval S] [root ...]  (run with TFC_WATCH=0 on the app side)
+    import argparse
+    ap = argparse.ArgumentParser(description="Pre-parse workbooks in the dashboard's data roots")
+    ap.add_argument("roots", nargs="*", default=ROOTS)
+    ap.add_argument("--interval", type=float, default=INTERVAL)
+    ap.add_argument("--once", action="store_true", help="scan and warm once, then exit")
+    args = ap.parse_args()
+    w = Watcher(args.roots, args.interval)
+    if args.once:
+        SETTLE = 0
+        for p in w.poll_once():
+            print(f"warmed {p}: {w.files[p]['sheets']} sheets")
+    else:
+        try:
+            w.run()
+        except KeyboardInterrupt:
+            pass